@@ -7,14 +7,16 @@ Analyzes debate patterns to infer:
 - MBTI-style cognitive preferences from debate behavior
 """
 
+import io
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Union
 from dataclasses import dataclass, field
 
 from analysis.claude_client import ClaudeClient
 from models.user_profile import (
     DebateThread,
     ArgumentQuality,
+    QualityAggregate,
     Archetype,
     ArchetypeType,
     MBTIAssessment,
@@ -22,6 +24,9 @@ from models.user_profile import (
 
 logger = logging.getLogger(__name__)
 
+# Valid archetype strings, checked before enum construction
+_ARCHETYPE_VALUES = frozenset(t.value for t in ArchetypeType)
+
 
 SYSTEM_PROMPT = """You are an expert in argumentation theory, personality psychology, and debate coaching.
 
@@ -32,7 +37,7 @@ You analyze debate patterns to identify:
 You base assessments on observable behavior, not speculation. You identify patterns
 across multiple debates rather than isolated incidents.
 
-Always respond with valid JSON matching the requested schema."""
+Always report results through the provided tool."""
 
 
 ARCHETYPE_PROMPT = """Analyze this debater's style across their debates to determine their archetype.
@@ -55,91 +60,20 @@ ARCHETYPE_PROMPT = """Analyze this debater's style across their debates to deter
 
 Classify the debater into one PRIMARY archetype and up to two SECONDARY tendencies.
 
-### Archetype Definitions
-
-**THE PROFESSOR** 📚
-- Leads with data, citations, and scholarly references
-- Structures arguments academically
-- Values accuracy and precision over rhetorical flourish
-- Signals: High evidence scores, academic language, source citations
-
-**THE SOCRATIC** 🎯
-- Uses questions to guide opponents to contradictions
-- Rarely makes direct assertions
-- Draws out implications rather than stating conclusions
-- Signals: Question-heavy style, high counterargument engagement
-
-**THE ANALYST** 🔍
-- Breaks down arguments into component parts
-- Identifies logical structure and tests each premise
-- Systematic, methodical approach
-- Signals: High structure scores, numbered points, "let's break this down"
-
-**THE ADVOCATE** 🔥
-- Argues with passion and conviction
-- Strong moral framing
-- Persuasive and engaging style
-- Signals: High persuasiveness, emotional appeals, clear position-taking
-
-**THE PHILOSOPHER** 🤔
-- Explores underlying assumptions and first principles
-- Comfortable with abstraction and hypotheticals
-- Questions definitions and frameworks
-- Signals: Abstract language, "what do you mean by...", thought experiments
-
-**THE DIPLOMAT** 🤝
-- Seeks common ground and synthesis
-- Acknowledges valid points on both sides
-- Bridge-building communication style
-- Signals: High civility, steelmanning, "I see your point but..."
-
-**THE CONTRARIAN** ⚡
-- Takes opposing views to challenge consensus
-- Devil's advocate approach
-- Tests ideas through opposition
-- Signals: Counter-positioning, "actually...", challenging popular views
-
-**THE EMPIRICIST** 📊
-- Relies on real-world examples and case studies
-- Prefers concrete over abstract
-- Experience-based argumentation
-- Signals: Anecdotes, case studies, "in practice...", data over theory
-
-## Required JSON Output
-
-{{
-    "username": "{username}",
-    "primary_archetype": {{
-        "type": "professor",
-        "confidence": 0.82,
-        "evidence": [
-            "Consistently cites academic sources",
-            "Uses formal argument structure",
-            "High evidence scores across debates"
-        ]
-    }},
-    "secondary_archetypes": [
-        {{
-            "type": "analyst",
-            "confidence": 0.65,
-            "evidence": ["Frequently breaks down arguments into numbered points"]
-        }}
-    ],
-    "archetype_blend": "Professor-Analyst: Academic rigor with systematic breakdown",
-    "style_description": "A methodical debater who leads with evidence and structures arguments clearly. Prefers factual precision over emotional appeal.",
-    "signature_moves": [
-        "Opens with data or citations",
-        "Uses numbered lists for clarity",
-        "Acknowledges counterevidence before addressing it"
-    ],
-    "potential_blindspots": [
-        "May come across as condescending",
-        "Sometimes over-relies on authority",
-        "Could engage more with emotional aspects"
-    ]
-}}
-
-Archetype types must be one of: professor, socratic, analyst, advocate, philosopher, diplomat, contrarian, empiricist, generalist"""
+### Archetype Definitions (type: style; signals)
+- professor: data/citation-led, academic structure, precision over rhetoric; high evidence scores, source citations
+- socratic: guides opponents to contradictions through questions, few direct assertions; question-heavy, high counterargument engagement
+- analyst: breaks arguments into parts and tests each premise methodically; high structure scores, numbered points
+- advocate: passionate conviction, moral framing, clear position-taking; high persuasiveness, emotional appeals
+- philosopher: probes assumptions, definitions and first principles; abstraction, hypotheticals, thought experiments
+- diplomat: seeks common ground, acknowledges both sides; high civility, steelmanning
+- contrarian: challenges consensus, devil's advocate; counter-positioning, "actually..."
+- empiricist: real-world examples and case studies over theory; anecdotes, "in practice..."
+- generalist: no single style dominates
+
+## Output
+
+Report the classification with the report_archetype tool."""
 
 
 MBTI_PROMPT = """Analyze this debater's cognitive patterns to infer MBTI-style preferences.
@@ -152,108 +86,117 @@ MBTI_PROMPT = """Analyze this debater's cognitive patterns to infer MBTI-style p
 
 ## MBTI Inference from Debate Behavior
 
-Analyze each cognitive dimension based on OBSERVABLE debate behavior:
-
-### E/I - Extraversion vs Introversion (Information Engagement)
-**Extraversion signals in debate:**
-- Responds quickly to many threads
-- Engages broadly across topics
-- Builds on others' ideas collaboratively
-- Higher comment volume, shorter exchanges
-
-**Introversion signals in debate:**
-- Deeper engagement with fewer threads
-- Develops ideas fully before responding
-- More self-contained arguments
-- Lower volume, longer exchanges
-
-### S/N - Sensing vs Intuition (Information Processing)
-**Sensing signals in debate:**
-- Focuses on concrete facts and examples
-- Practical, real-world applications
-- Step-by-step reasoning
-- "What actually happened" focus
-
-**Intuition signals in debate:**
-- Focuses on patterns and implications
-- Abstract principles and theories
-- Leaps between ideas
-- "What could this mean" focus
-
-### T/F - Thinking vs Feeling (Decision Criteria)
-**Thinking signals in debate:**
-- Logic-first argumentation
-- Impersonal analysis
-- Consistency and fairness principles
-- Comfortable with conflict
-
-**Feeling signals in debate:**
-- Values-first argumentation
-- Personal impact consideration
-- Harmony and relationship preservation
-- Conflict-averse adaptation
-
-### J/P - Judging vs Perceiving (Argument Closure)
-**Judging signals in debate:**
-- Drives toward conclusions
-- Structured argument presentation
-- Decisive stance-taking
-- Wants to "resolve" debates
-
-**Perceiving signals in debate:**
-- Explores multiple angles
-- Flexible argument adaptation
-- Comfortable with ambiguity
-- Keeps options open
-
-## Required JSON Output
-
-{{
-    "username": "{username}",
-    "mbti_type": "INTJ",
-    "confidence": 0.72,
-    "dimension_analysis": {{
-        "E_I": {{
-            "preference": "I",
-            "confidence": 0.78,
-            "evidence": [
-                "Engages deeply with fewer threads rather than broadly",
-                "Develops comprehensive arguments before posting"
-            ]
-        }},
-        "S_N": {{
-            "preference": "N",
-            "confidence": 0.81,
-            "evidence": [
-                "Frequently discusses theoretical implications",
-                "Makes conceptual leaps between ideas"
-            ]
-        }},
-        "T_F": {{
-            "preference": "T",
-            "confidence": 0.85,
-            "evidence": [
-                "Leads with logical analysis",
-                "Comfortable engaging in direct disagreement"
-            ]
-        }},
-        "J_P": {{
-            "preference": "J",
-            "confidence": 0.68,
-            "evidence": [
-                "Structures arguments with clear conclusions",
-                "Drives debates toward resolution"
-            ]
-        }}
-    }},
-    "type_description": "The Architect - Strategic thinkers who see patterns and build systems. In debate, they construct careful logical frameworks and anticipate counterarguments.",
-    "debate_implications": [
-        "Likely to prepare structured arguments in advance",
-        "May struggle with purely emotional appeals",
-        "Excels at long-term strategic positioning"
-    ],
-    "caveat": "MBTI inference from debate behavior is speculative. Debate style may differ from overall personality."
-}}"""
+Analyze each cognitive dimension based on OBSERVABLE debate behavior (pole: signals):
+
+E/I - Information Engagement
+- E: quick responses across many threads and topics, builds on others' ideas, high volume, short exchanges
+- I: deep engagement with few threads, fully developed self-contained arguments, low volume, long exchanges
+
+S/N - Information Processing
+- S: concrete facts and examples, practical applications, step-by-step reasoning, "what actually happened"
+- N: patterns and implications, abstract principles, leaps between ideas, "what could this mean"
+
+T/F - Decision Criteria
+- T: logic-first, impersonal analysis, consistency and fairness, comfortable with conflict
+- F: values-first, personal impact, harmony-preserving, conflict-averse adaptation
+
+J/P - Argument Closure
+- J: drives toward conclusions, structured presentation, decisive stances, wants resolution
+- P: explores multiple angles, adapts flexibly, comfortable with ambiguity, keeps options open
+
+## Output
+
+Report the assessment with the report_mbti tool. Include a caveat that MBTI inference
+from debate behavior is speculative."""
+
+
+_EVIDENCE_LIST = {"type": "array", "items": {"type": "string"}}
+
+_ARCHETYPE_ENTRY = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string", "enum": sorted(_ARCHETYPE_VALUES)},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "evidence": _EVIDENCE_LIST,
+    },
+    "required": ["type", "confidence", "evidence"],
+}
+
+ARCHETYPE_TOOL = {
+    "name": "report_archetype",
+    "description": "Report the debater's primary and secondary debate archetypes.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "username": {"type": "string"},
+            "primary_archetype": _ARCHETYPE_ENTRY,
+            "secondary_archetypes": {
+                "type": "array",
+                "items": _ARCHETYPE_ENTRY,
+                "maxItems": 2,
+            },
+            "archetype_blend": {"type": "string"},
+            "style_description": {"type": "string"},
+            "signature_moves": _EVIDENCE_LIST,
+            "potential_blindspots": _EVIDENCE_LIST,
+        },
+        "required": [
+            "primary_archetype",
+            "secondary_archetypes",
+            "archetype_blend",
+            "style_description",
+            "signature_moves",
+            "potential_blindspots",
+        ],
+    },
+}
+
+
+def _dimension(first: str, second: str) -> Dict[str, Any]:
+    """Schema for one MBTI dimension with its two poles"""
+    return {
+        "type": "object",
+        "properties": {
+            "preference": {"type": "string", "enum": [first, second]},
+            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+            "evidence": _EVIDENCE_LIST,
+        },
+        "required": ["preference", "confidence", "evidence"],
+    }
+
+
+MBTI_TOOL = {
+    "name": "report_mbti",
+    "description": "Report the debater's inferred MBTI-style preferences.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "username": {"type": "string"},
+            "mbti_type": {"type": "string", "pattern": "^[EI][SN][TF][JP]$"},
+            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+            "dimension_analysis": {
+                "type": "object",
+                "properties": {
+                    "E_I": _dimension("E", "I"),
+                    "S_N": _dimension("S", "N"),
+                    "T_F": _dimension("T", "F"),
+                    "J_P": _dimension("J", "P"),
+                },
+                "required": ["E_I", "S_N", "T_F", "J_P"],
+            },
+            "type_description": {"type": "string"},
+            "debate_implications": _EVIDENCE_LIST,
+            "caveat": {"type": "string"},
+        },
+        "required": [
+            "mbti_type",
+            "confidence",
+            "dimension_analysis",
+            "type_description",
+            "debate_implications",
+        ],
+    },
+}
 
 
 @dataclass
@@ -286,92 +229,112 @@ class ArchetypeAnalyzer:
     def __init__(self, claude_client: ClaudeClient):
         self.client = claude_client
 
+    @staticmethod
+    def _collect_samples(debates: List[DebateThread]) -> Dict[str, str]:
+        """Map thread_id to the body of the user's first comment"""
+        return {
+            d.thread_id: d.user_comments[0].body
+            for d in debates
+            if d.user_comments
+        }
+
+    @staticmethod
+    def _truncate(text: str, limit: int) -> str:
+        return text[:limit] + "..." if len(text) > limit else text
+
     def _format_debate_summaries(
         self,
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
+        samples: Dict[str, str],
         max_debates: int = 15,
     ) -> str:
         """Format debate summaries for prompt"""
-        lines = []
+        buf = io.StringIO()
+        w = buf.write
 
         for debate in debates[:max_debates]:
             quality = quality_results.get(debate.thread_id)
+            metadata = debate.metadata
 
-            lines.append(f"\n### Debate in r/{debate.subreddit}")
-            lines.append(f"Topic: {debate.metadata.topic if debate.metadata else 'Unknown'}")
-            lines.append(f"Position: {debate.metadata.user_position if debate.metadata else 'Unknown'}")
+            w(
+                f"\n### Debate in r/{debate.subreddit}\n"
+                f"Topic: {metadata.topic if metadata else 'Unknown'}\n"
+                f"Position: {metadata.user_position if metadata else 'Unknown'}\n"
+            )
 
             if quality:
-                lines.append(f"Quality Scores:")
-                lines.append(f"  - Structure: {quality.structure_score}")
-                lines.append(f"  - Evidence: {quality.evidence_score}")
-                lines.append(f"  - Counterargument: {quality.counterargument_score}")
-                lines.append(f"  - Persuasiveness: {quality.persuasiveness_score}")
-                lines.append(f"  - Civility: {quality.civility_score}")
+                w(
+                    "Quality Scores:\n"
+                    f"  - Structure: {quality.structure_score}\n"
+                    f"  - Evidence: {quality.evidence_score}\n"
+                    f"  - Counterargument: {quality.counterargument_score}\n"
+                    f"  - Persuasiveness: {quality.persuasiveness_score}\n"
+                    f"  - Civility: {quality.civility_score}\n"
+                )
 
                 if quality.is_top_argument_candidate:
-                    lines.append(f"  ⭐ Top Argument Candidate")
+                    w("  ⭐ Top Argument Candidate\n")
 
             # Sample user comment
-            if debate.user_comments:
-                sample = debate.user_comments[0].body[:300]
-                if len(debate.user_comments[0].body) > 300:
-                    sample += "..."
-                lines.append(f"Sample argument: \"{sample}\"")
+            sample = samples.get(debate.thread_id)
+            if sample is not None:
+                w(f"Sample argument: \"{self._truncate(sample, 300)}\"\n")
 
-            lines.append("")
+            w("\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def _format_behavior_patterns(
         self,
         debates: List[DebateThread],
-        quality_results: Dict[str, ArgumentQuality],
+        aggregate: QualityAggregate,
+        samples: Dict[str, str],
     ) -> str:
         """Format behavior patterns for MBTI analysis"""
-        lines = []
+        buf = io.StringIO()
+        w = buf.write
 
         # Engagement patterns
         total_comments = sum(d.user_comment_count for d in debates)
         avg_comments_per_thread = total_comments / len(debates) if debates else 0
 
-        lines.append("## Engagement Patterns")
-        lines.append(f"- Total debates: {len(debates)}")
-        lines.append(f"- Average comments per debate: {avg_comments_per_thread:.1f}")
-        lines.append(f"- Topics engaged: {len(set(d.subreddit for d in debates))} subreddits")
+        w(
+            "## Engagement Patterns\n"
+            f"- Total debates: {len(debates)}\n"
+            f"- Average comments per debate: {avg_comments_per_thread:.1f}\n"
+            f"- Topics engaged: {len(set(d.subreddit for d in debates))} subreddits\n"
+        )
 
         # Content patterns
-        lines.append("\n## Argumentation Patterns")
+        w("\n## Argumentation Patterns\n")
 
-        if quality_results:
-            scores = list(quality_results.values())
-            lines.append(f"- Average evidence usage: {sum(q.evidence_score for q in scores)/len(scores):.0f}")
-            lines.append(f"- Average structure: {sum(q.structure_score for q in scores)/len(scores):.0f}")
-            lines.append(f"- Average persuasiveness: {sum(q.persuasiveness_score for q in scores)/len(scores):.0f}")
-
-            # Check for patterns
-            high_evidence = sum(1 for q in scores if q.evidence_score >= 70)
-            high_civility = sum(1 for q in scores if q.civility_score >= 80)
-
-            lines.append(f"- High-evidence debates: {high_evidence}/{len(scores)}")
-            lines.append(f"- High-civility debates: {high_civility}/{len(scores)}")
+        if aggregate.n:
+            w(
+                f"- Average evidence usage: {aggregate.avg_evidence():.0f}\n"
+                f"- Average structure: {aggregate.avg_structure():.0f}\n"
+                f"- Average persuasiveness: {aggregate.avg_persuade():.0f}\n"
+                f"- High-evidence debates: {aggregate.high_evidence}/{aggregate.n}\n"
+                f"- High-civility debates: {aggregate.high_civility}/{aggregate.n}\n"
+            )
 
         # Sample quotes for style analysis
-        lines.append("\n## Sample Statements")
+        w("\n## Sample Statements")
         for debate in debates[:5]:
-            if debate.user_comments:
-                sample = debate.user_comments[0].body[:200]
-                lines.append(f"- \"{sample}...\"")
+            sample = samples.get(debate.thread_id)
+            if sample is not None:
+                w(f"\n- \"{self._truncate(sample, 200)}\"")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def classify_archetype(
         self,
         username: str,
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
-    ) -> ArchetypeResult:
+        aggregate: Optional[QualityAggregate] = None,
+        stream: bool = False,
+    ) -> Union[ArchetypeResult, Iterator[ArchetypeResult]]:
         """
         Classify user's debate archetype.
 
@@ -379,39 +342,46 @@ class ArchetypeAnalyzer:
             username: Reddit username
             debates: List of debate threads
             quality_results: Quality analysis results
+            aggregate: Precomputed quality totals (built from quality_results if omitted)
+            stream: Yield progressively filled results as Claude's response arrives
 
         Returns:
-            ArchetypeResult with primary and secondary archetypes
+            ArchetypeResult with primary and secondary archetypes, or an
+            iterator of partial ArchetypeResults when stream=True
         """
         logger.info(f"Classifying archetype for u/{username}")
 
-        # Calculate averages
-        if quality_results:
-            scores = list(quality_results.values())
-            avg_structure = sum(q.structure_score for q in scores) / len(scores)
-            avg_evidence = sum(q.evidence_score for q in scores) / len(scores)
-            avg_counter = sum(q.counterargument_score for q in scores) / len(scores)
-            avg_persuade = sum(q.persuasiveness_score for q in scores) / len(scores)
-            avg_civility = sum(q.civility_score for q in scores) / len(scores)
-        else:
-            avg_structure = avg_evidence = avg_counter = avg_persuade = avg_civility = 50
+        if aggregate is None:
+            aggregate = QualityAggregate.from_qualities(quality_results.values())
 
-        debate_summaries = self._format_debate_summaries(debates, quality_results)
+        samples = self._collect_samples(debates)
+        debate_summaries = self._format_debate_summaries(debates, quality_results, samples)
 
         prompt = ARCHETYPE_PROMPT.format(
             username=username,
             debate_summaries=debate_summaries,
-            avg_structure=f"{avg_structure:.0f}",
-            avg_evidence=f"{avg_evidence:.0f}",
-            avg_counterargument=f"{avg_counter:.0f}",
-            avg_persuasiveness=f"{avg_persuade:.0f}",
-            avg_civility=f"{avg_civility:.0f}",
+            avg_structure=f"{aggregate.avg_structure(50):.0f}",
+            avg_evidence=f"{aggregate.avg_evidence(50):.0f}",
+            avg_counterargument=f"{aggregate.avg_counter(50):.0f}",
+            avg_persuasiveness=f"{aggregate.avg_persuade(50):.0f}",
+            avg_civility=f"{aggregate.avg_civility(50):.0f}",
             total_debates=len(debates),
         )
 
+        if stream:
+            return (
+                self._parse_archetype_response(partial)
+                for partial in self.client.analyze_stream(
+                    system_prompt=SYSTEM_PROMPT,
+                    user_prompt=prompt,
+                    tool=ARCHETYPE_TOOL,
+                )
+            )
+
         response = self.client.analyze(
             system_prompt=SYSTEM_PROMPT,
             user_prompt=prompt,
+            tool=ARCHETYPE_TOOL,
         )
 
         return self._parse_archetype_response(response)
@@ -421,28 +391,32 @@ class ArchetypeAnalyzer:
 
         # Parse primary archetype
         primary_data = response.get("primary_archetype", {})
-        try:
-            primary_type = ArchetypeType(primary_data.get("type", "generalist"))
-        except ValueError:
-            primary_type = ArchetypeType.GENERALIST
+        type_value = primary_data.get("type")
+        primary_type = (
+            ArchetypeType(type_value)
+            if type_value in _ARCHETYPE_VALUES
+            else ArchetypeType.GENERALIST
+        )
 
         primary = Archetype(
-            archetype_type=primary_type,
+            type=primary_type,
             confidence=primary_data.get("confidence", 0.5),
+            description="",
             evidence=primary_data.get("evidence", []),
         )
 
         # Parse secondary archetypes
         secondary = []
         for sec_data in response.get("secondary_archetypes", []):
-            try:
-                sec_type = ArchetypeType(sec_data.get("type", "generalist"))
-            except ValueError:
+            type_value = sec_data.get("type", "generalist")
+            if type_value not in _ARCHETYPE_VALUES:
                 continue
+            sec_type = ArchetypeType(type_value)
 
             secondary.append(Archetype(
-                archetype_type=sec_type,
+                type=sec_type,
                 confidence=sec_data.get("confidence", 0.5),
+                description="",
                 evidence=sec_data.get("evidence", []),
             ))
 
@@ -460,7 +434,9 @@ class ArchetypeAnalyzer:
         username: str,
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
-    ) -> MBTIResult:
+        aggregate: Optional[QualityAggregate] = None,
+        stream: bool = False,
+    ) -> Union[MBTIResult, Iterator[MBTIResult]]:
         """
         Infer MBTI type from debate patterns.
 
@@ -468,22 +444,40 @@ class ArchetypeAnalyzer:
             username: Reddit username
             debates: List of debate threads
             quality_results: Quality analysis results
+            aggregate: Precomputed quality totals (built from quality_results if omitted)
+            stream: Yield progressively filled results as Claude's response arrives
 
         Returns:
-            MBTIResult with type and dimension analysis
+            MBTIResult with type and dimension analysis, or an iterator of
+            partial MBTIResults when stream=True
         """
         logger.info(f"Inferring MBTI for u/{username}")
 
-        behavior_patterns = self._format_behavior_patterns(debates, quality_results)
+        if aggregate is None:
+            aggregate = QualityAggregate.from_qualities(quality_results.values())
+
+        samples = self._collect_samples(debates)
+        behavior_patterns = self._format_behavior_patterns(debates, aggregate, samples)
 
         prompt = MBTI_PROMPT.format(
             username=username,
             behavior_patterns=behavior_patterns,
         )
 
+        if stream:
+            return (
+                self._parse_mbti_response(partial)
+                for partial in self.client.analyze_stream(
+                    system_prompt=SYSTEM_PROMPT,
+                    user_prompt=prompt,
+                    tool=MBTI_TOOL,
+                )
+            )
+
         response = self.client.analyze(
             system_prompt=SYSTEM_PROMPT,
             user_prompt=prompt,
+            tool=MBTI_TOOL,
         )
 
         return self._parse_mbti_response(response)
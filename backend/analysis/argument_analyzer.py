@@ -4,6 +4,8 @@ Argument quality analysis using Claude
 Analyzes individual debates for argument quality, structure, evidence, and more.
 """
 
+import asyncio
+import io
 import logging
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
@@ -31,10 +33,20 @@ You analyze online debates with precision, evaluating:
 - Logical fallacies
 
 You provide objective, balanced assessments that help understand debate quality.
-Always respond with valid JSON matching the requested schema."""
+Always report results through the provided tool."""
 
 
-ARGUMENT_QUALITY_PROMPT = """Analyze the argument quality in this debate exchange.
+def _build_argument_quality_prompt(
+    thread_title: str,
+    subreddit: str,
+    topic: str,
+    user_position: str,
+    opponent_position: str,
+    user_comments: str,
+    opponent_comments: str,
+) -> str:
+    """Render the argument quality prompt (f-string compiled once, no per-call format parsing)"""
+    return f"""Analyze the argument quality in this debate exchange.
 
 ## Debate Context
 - Thread: {thread_title}
@@ -61,75 +73,9 @@ Evaluate the USER's argumentation quality across these dimensions:
 
 Also identify any logical fallacies committed by the user.
 
-## Required JSON Output
-
-{{
-    "debate_id": "{thread_id}",
-    "overall_score": 78,
-
-    "structure": {{
-        "score": 82,
-        "has_clear_thesis": true,
-        "premises_support_conclusion": true,
-        "logical_flow": "strong",
-        "notes": "Well-organized with numbered points"
-    }},
-
-    "evidence": {{
-        "score": 75,
-        "citation_count": 2,
-        "citation_quality": "medium",
-        "citations": [
-            {{
-                "claim": "The claim being supported",
-                "source": "Source cited",
-                "source_type": "academic|journalistic|primary|anecdotal",
-                "properly_contextualized": true
-            }}
-        ],
-        "notes": "Good use of data, could use more primary sources"
-    }},
-
-    "counterargument_engagement": {{
-        "score": 70,
-        "addresses_opponent_points": true,
-        "steelmans_opponent": false,
-        "strawmans_opponent": false,
-        "missed_points": ["Did not address the cost argument"],
-        "notes": "Engages most points but missed one key objection"
-    }},
-
-    "persuasiveness": {{
-        "score": 85,
-        "changed_opponent_mind": true,
-        "opponent_concession_quote": "You make a good point about...",
-        "effective_techniques": ["data-first opening", "systematic breakdown"],
-        "notes": "Successfully shifted opponent's view"
-    }},
-
-    "civility": {{
-        "score": 95,
-        "personal_attacks": false,
-        "condescension": false,
-        "notes": "Maintained professional tone"
-    }},
-
-    "fallacies": [
-        {{
-            "type": "hasty_generalization",
-            "confidence": 0.75,
-            "severity": "minor",
-            "user_statement": "All companies saw productivity gains",
-            "explanation": "Overgeneralizes from limited examples"
-        }}
-    ],
-
-    "is_top_argument_candidate": true,
-    "top_argument_reasons": [
-        "Strong evidence usage",
-        "Changed opponent's mind"
-    ]
-}}
+## Output
+
+Report the assessment with the report_argument_quality tool.
 
 Fallacy types: ad_hominem, strawman, false_dichotomy, appeal_to_authority, appeal_to_emotion,
 hasty_generalization, slippery_slope, red_herring, circular_reasoning, moving_goalposts,
@@ -138,6 +84,117 @@ no_true_scotsman, whataboutism, false_cause, appeal_to_nature, sealioning, gish_
 Severity levels: minor, moderate, significant, severe"""
 
 
+def _scored(**properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Schema for a 0-100 scored dimension with notes and extra fields"""
+    return {
+        "type": "object",
+        "properties": {
+            "score": {"type": "integer", "minimum": 0, "maximum": 100},
+            "notes": {"type": "string"},
+            **properties,
+        },
+        "required": ["score", "notes"],
+    }
+
+
+_BOOL = {"type": "boolean"}
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+ARGUMENT_QUALITY_TOOL = {
+    "name": "report_argument_quality",
+    "description": "Report the user's argument quality and fallacies for one debate.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "overall_score": {"type": "integer", "minimum": 0, "maximum": 100},
+            "structure": _scored(
+                has_clear_thesis=_BOOL,
+                premises_support_conclusion=_BOOL,
+                logical_flow={"type": "string", "enum": ["weak", "moderate", "strong"]},
+            ),
+            "evidence": _scored(
+                citation_count={"type": "integer", "minimum": 0},
+                citation_quality={"type": "string", "enum": ["low", "medium", "high"]},
+                citations={
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "claim": {"type": "string"},
+                            "source": {"type": "string"},
+                            "source_type": {
+                                "type": "string",
+                                "enum": ["academic", "journalistic", "primary", "anecdotal"],
+                            },
+                            "properly_contextualized": _BOOL,
+                        },
+                        "required": ["claim", "source", "source_type"],
+                    },
+                },
+            ),
+            "counterargument_engagement": _scored(
+                addresses_opponent_points=_BOOL,
+                steelmans_opponent=_BOOL,
+                strawmans_opponent=_BOOL,
+                missed_points=_STRING_LIST,
+            ),
+            "persuasiveness": _scored(
+                changed_opponent_mind=_BOOL,
+                opponent_concession_quote={"type": ["string", "null"]},
+                effective_techniques=_STRING_LIST,
+            ),
+            "civility": _scored(
+                personal_attacks=_BOOL,
+                condescension=_BOOL,
+            ),
+            "fallacies": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "enum": [t.value for t in FallacyType]},
+                        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                        "severity": {"type": "string", "enum": [s.value for s in FallacySeverity]},
+                        "user_statement": {"type": "string"},
+                        "explanation": {"type": "string"},
+                    },
+                    "required": ["type", "confidence", "severity", "user_statement", "explanation"],
+                },
+            },
+            "is_top_argument_candidate": _BOOL,
+            "top_argument_reasons": _STRING_LIST,
+        },
+        "required": [
+            "overall_score",
+            "structure",
+            "evidence",
+            "counterargument_engagement",
+            "persuasiveness",
+            "civility",
+            "fallacies",
+            "is_top_argument_candidate",
+        ],
+    },
+}
+
+
+# Re-prompts allowed when a response fails validation
+MAX_FORMAT_RETRIES = 2
+
+# Claude calls in flight at once when analyzing several debates
+MAX_CONCURRENT_ANALYSES = 8
+
+
+# Default dimension weights for calculate_overall_score
+DEFAULT_SCORE_WEIGHTS: Dict[str, float] = {
+    "structure": 0.20,
+    "evidence": 0.25,
+    "counterargument": 0.20,
+    "persuasiveness": 0.20,
+    "civility": 0.15,
+}
+
+
 class ArgumentAnalyzer:
     """
     Analyzes argument quality in debates using Claude.
@@ -156,17 +213,16 @@ class ArgumentAnalyzer:
         max_chars: int = 800,
     ) -> str:
         """Format comments for prompt"""
-        lines = []
-        for i, comment in enumerate(comments[:max_comments]):
+        buf = io.StringIO()
+        w = buf.write
+        for comment in comments[:max_comments]:
             body = comment.body[:max_chars]
             if len(comment.body) > max_chars:
                 body += "..."
 
-            lines.append(f"[{comment.id}] (depth: {comment.depth}, score: {comment.score})")
-            lines.append(f"{body}")
-            lines.append("")
+            w(f"[{comment.id}] (depth: {comment.depth}, score: {comment.score})\n{body}\n\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def analyze_debate(
         self,
@@ -183,6 +239,70 @@ class ArgumentAnalyzer:
         """
         logger.debug(f"Analyzing argument quality for thread {thread.thread_id}")
 
+        prompt = self._build_prompt(thread)
+
+        # Call Claude, re-prompting with the problem when the response is
+        # malformed. Transient request failures are retried (honouring
+        # Retry-After) inside ClaudeClient, so they are not retried here
+        user_prompt = prompt
+        format_retries = 0
+
+        while True:
+            response = self.client.analyze(
+                system_prompt=SYSTEM_PROMPT,
+                user_prompt=user_prompt,
+                tool=ARGUMENT_QUALITY_TOOL,
+                validate=self._validate_quality_response,
+            )
+
+            problem = self._validate_quality_response(response)
+            if problem is None:
+                break
+            if format_retries >= MAX_FORMAT_RETRIES:
+                logger.warning(f"Invalid response for thread {thread.thread_id} after retries: {problem}")
+                break
+
+            format_retries += 1
+            logger.debug(f"Invalid response for thread {thread.thread_id}, re-prompting: {problem}")
+            user_prompt = self._reprompt(prompt, problem)
+
+        # Parse response
+        return self._parse_quality_response(response, thread.thread_id)
+
+    async def aanalyze_debate(
+        self,
+        thread: DebateThread,
+    ) -> ArgumentQuality:
+        """Async variant of analyze_debate()"""
+        logger.debug(f"Analyzing argument quality for thread {thread.thread_id}")
+
+        prompt = self._build_prompt(thread)
+        user_prompt = prompt
+        format_retries = 0
+
+        while True:
+            response = await self.client.aanalyze(
+                system_prompt=SYSTEM_PROMPT,
+                user_prompt=user_prompt,
+                tool=ARGUMENT_QUALITY_TOOL,
+                validate=self._validate_quality_response,
+            )
+
+            problem = self._validate_quality_response(response)
+            if problem is None:
+                break
+            if format_retries >= MAX_FORMAT_RETRIES:
+                logger.warning(f"Invalid response for thread {thread.thread_id} after retries: {problem}")
+                break
+
+            format_retries += 1
+            logger.debug(f"Invalid response for thread {thread.thread_id}, re-prompting: {problem}")
+            user_prompt = self._reprompt(prompt, problem)
+
+        return self._parse_quality_response(response, thread.thread_id)
+
+    def _build_prompt(self, thread: DebateThread) -> str:
+        """Argument quality prompt for one debate thread"""
         # Extract metadata
         topic = thread.metadata.topic if thread.metadata else "Unknown"
         user_position = thread.metadata.user_position if thread.metadata else "Unknown"
@@ -192,7 +312,7 @@ class ArgumentAnalyzer:
         user_comments = self._format_comments(thread.user_comments)
         opponent_comments = self._format_comments(thread.opponent_comments) if thread.opponent_comments else "No opponent comments available"
 
-        prompt = ARGUMENT_QUALITY_PROMPT.format(
+        return _build_argument_quality_prompt(
             thread_title=thread.thread_title[:100],
             subreddit=thread.subreddit,
             topic=topic,
@@ -200,17 +320,40 @@ class ArgumentAnalyzer:
             opponent_position=opponent_position,
             user_comments=user_comments,
             opponent_comments=opponent_comments,
-            thread_id=thread.thread_id,
         )
 
-        # Call Claude
-        response = self.client.analyze(
-            system_prompt=SYSTEM_PROMPT,
-            user_prompt=prompt,
+    @staticmethod
+    def _reprompt(prompt: str, problem: str) -> str:
+        """Original prompt plus what was wrong with the previous response"""
+        return (
+            f"{prompt}\n\nYour previous response was not valid: {problem}. "
+            f"Call {ARGUMENT_QUALITY_TOOL['name']} with every required field."
         )
 
-        # Parse response
-        return self._parse_quality_response(response, thread.thread_id)
+    @staticmethod
+    def _validate_quality_response(response: Dict) -> Optional[str]:
+        """
+        Check a quality response for the problems a re-prompt can fix.
+
+        Returns:
+            Description of the problem, or None if the response is usable
+        """
+        if not response:
+            return "no structured output was returned"
+
+        schema = ARGUMENT_QUALITY_TOOL["input_schema"]
+        missing = [key for key in schema["required"] if key not in response]
+        if missing:
+            return f"missing fields {', '.join(missing)}"
+
+        malformed = [
+            key for key, spec in schema["properties"].items()
+            if spec.get("type") == "object" and not isinstance(response.get(key, {}), dict)
+        ]
+        if malformed:
+            return f"fields {', '.join(malformed)} must be objects"
+
+        return None
 
     def _parse_quality_response(
         self,
@@ -272,18 +415,30 @@ class ArgumentAnalyzer:
         """
         Analyze multiple debates.
 
+        Debates are analyzed concurrently via aanalyze_debates_batch().
+        Inside a running event loop, await aanalyze_debates_batch()
+        directly instead; this method then falls back to analyzing
+        debates one at a time.
+
         Args:
             threads: List of debate threads to analyze
 
         Returns:
             Dict mapping thread_id to ArgumentQuality
         """
-        results = {}
+        debate_threads = [t for t in threads if t.is_debate]
+        if not debate_threads:
+            logger.info("No debates to analyze for argument quality")
+            return {}
 
-        for thread in threads:
-            if not thread.is_debate:
-                continue
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._analyze_and_close(debate_threads))
 
+        results = {}
+
+        for thread in debate_threads:
             try:
                 quality = self.analyze_debate(thread)
                 results[thread.thread_id] = quality
@@ -294,6 +449,65 @@ class ArgumentAnalyzer:
         logger.info(f"Analyzed argument quality for {len(results)} debates")
         return results
 
+    async def _analyze_and_close(
+        self,
+        debates: List[DebateThread],
+    ) -> Dict[str, ArgumentQuality]:
+        """Run _aanalyze_debates on a throwaway loop, then release its connections"""
+        try:
+            return await self._aanalyze_debates(debates, MAX_CONCURRENT_ANALYSES)
+        finally:
+            await self.client.aclose()
+
+    async def aanalyze_debates_batch(
+        self,
+        threads: List[DebateThread],
+        max_concurrency: int = MAX_CONCURRENT_ANALYSES,
+    ) -> Dict[str, ArgumentQuality]:
+        """
+        Async variant of analyze_debates_batch() that analyzes debates concurrently.
+
+        Args:
+            threads: List of debate threads to analyze
+            max_concurrency: Maximum Claude calls in flight at once
+
+        Returns:
+            Dict mapping thread_id to ArgumentQuality
+        """
+        debate_threads = [t for t in threads if t.is_debate]
+        if not debate_threads:
+            logger.info("No debates to analyze for argument quality")
+            return {}
+
+        return await self._aanalyze_debates(debate_threads, max_concurrency)
+
+    async def _aanalyze_debates(
+        self,
+        debates: List[DebateThread],
+        max_concurrency: int,
+    ) -> Dict[str, ArgumentQuality]:
+        """Concurrently analyze threads already narrowed down to debates"""
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def analyze(thread: DebateThread) -> ArgumentQuality:
+            async with sem:
+                return await self.aanalyze_debate(thread)
+
+        # A failed debate is returned rather than raised so the others survive
+        outcomes = await asyncio.gather(
+            *[analyze(thread) for thread in debates], return_exceptions=True
+        )
+
+        results = {}
+        for thread, outcome in zip(debates, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error analyzing thread {thread.thread_id}: {outcome}")
+                continue
+            results[thread.thread_id] = outcome
+
+        logger.info(f"Analyzed argument quality for {len(results)} debates")
+        return results
+
     def extract_fallacies(
         self,
         threads: List[DebateThread],
@@ -312,6 +526,18 @@ class ArgumentAnalyzer:
         logger.info("Fallacy extraction not yet implemented separately")
         return []
 
+    @staticmethod
+    def _weight_tuple(weights: Optional[Dict[str, float]]) -> tuple:
+        """Resolve weights into (structure, evidence, counter, persuasion, civility)"""
+        w = weights if weights is not None else DEFAULT_SCORE_WEIGHTS
+        return (
+            w["structure"],
+            w["evidence"],
+            w["counterargument"],
+            w["persuasiveness"],
+            w["civility"],
+        )
+
     def calculate_overall_score(
         self,
         quality: ArgumentQuality,
@@ -327,21 +553,44 @@ class ArgumentAnalyzer:
         Returns:
             Overall score 0-100
         """
-        if weights is None:
-            weights = {
-                "structure": 0.20,
-                "evidence": 0.25,
-                "counterargument": 0.20,
-                "persuasiveness": 0.20,
-                "civility": 0.15,
-            }
+        w_s, w_e, w_c, w_p, w_v = self._weight_tuple(weights)
 
         score = (
-            quality.structure_score * weights["structure"] +
-            quality.evidence_score * weights["evidence"] +
-            quality.counterargument_score * weights["counterargument"] +
-            quality.persuasiveness_score * weights["persuasiveness"] +
-            quality.civility_score * weights["civility"]
+            quality.structure_score * w_s +
+            quality.evidence_score * w_e +
+            quality.counterargument_score * w_c +
+            quality.persuasiveness_score * w_p +
+            quality.civility_score * w_v
         )
 
         return int(round(score))
+
+    def calculate_overall_scores(
+        self,
+        qualities: List[ArgumentQuality],
+        weights: Optional[Dict[str, float]] = None,
+    ) -> List[int]:
+        """
+        Calculate weighted overall scores for many qualities at once.
+
+        Resolves the weights a single time rather than per quality.
+
+        Args:
+            qualities: ArgumentQualities to score
+            weights: Optional custom weights
+
+        Returns:
+            Overall scores 0-100, in input order
+        """
+        w_s, w_e, w_c, w_p, w_v = self._weight_tuple(weights)
+
+        return [
+            int(round(
+                q.structure_score * w_s +
+                q.evidence_score * w_e +
+                q.counterargument_score * w_c +
+                q.persuasiveness_score * w_p +
+                q.civility_score * w_v
+            ))
+            for q in qualities
+        ]
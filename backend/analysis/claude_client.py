@@ -5,13 +5,276 @@ Claude API client for debate analysis
 import json
 import re
 import time
+import random
+import asyncio
+import contextlib
 import ssl
 import logging
+import threading
+import importlib.util
+import urllib.error
 import urllib.request
-from typing import List, Dict, Optional, Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    List, Dict, Optional, Any, Iterator, Iterable, AsyncIterator, AsyncIterable,
+    Callable, Awaitable, Mapping, TypeVar, TYPE_CHECKING,
+)
+
+from analysis.rate_limiter import TokenBucket
+
+if TYPE_CHECKING:
+    from cache.cache_manager import CacheManager
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import json_repair
+except ImportError:
+    json_repair = None
 
 logger = logging.getLogger(__name__)
 
+# Connection pool sizing shared by every request made through one client
+HTTP_TIMEOUT_SECONDS = 180
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0
+
+# Per-attempt timeouts adapt to observed generation speed so a stalled
+# request is abandoned and retried instead of holding a batch for the full
+# HTTP_TIMEOUT_SECONDS. The budget is TIMEOUT_LATENCY_MULTIPLIER x the
+# expected time to generate max_tokens, plus slack, clamped to
+# [MIN_REQUEST_TIMEOUT_SECONDS, HTTP_TIMEOUT_SECONDS].
+MIN_REQUEST_TIMEOUT_SECONDS = 30.0
+TIMEOUT_LATENCY_MULTIPLIER = 2.0
+TIMEOUT_SLACK_SECONDS = 5.0
+LATENCY_EWMA_ALPHA = 0.2
+
+API_ORIGIN = "https://api.anthropic.com"
+API_URL = f"{API_ORIGIN}/v1/messages"
+BATCHES_URL = f"{API_URL}/batches"
+
+# Message Batches jobs usually finish within minutes but may take up to 24h;
+# give up (and cancel the job) after BATCH_MAX_WAIT_SECONDS
+BATCH_POLL_INTERVAL_SECONDS = 15.0
+BATCH_MAX_WAIT_SECONDS = 3600.0
+API_VERSION = "2023-06-01"
+
+# Retry policy defaults; delays are jittered by +/-50%
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_DELAY_SECONDS = 2.0
+MAX_RETRY_DELAY_SECONDS = 60.0
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+# Headers that say when the rate limit window resets (RFC 3339 timestamps)
+RATE_LIMIT_RESET_HEADERS = (
+    "anthropic-ratelimit-requests-reset",
+    "anthropic-ratelimit-tokens-reset",
+)
+
+# Fenced code block around a JSON reply, and the first JSON opening bracket
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```")
+_JSON_START_RE = re.compile(r"[\{\[]")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[\}\]])")
+
+# Rough prompt size estimate used for TPM throttling
+CHARS_PER_TOKEN = 4
+
+T = TypeVar("T")
+
+# Checks a parsed response, returning a description of the problem or None
+# if it is usable; rejected responses are never cached
+ResponseValidator = Callable[[Dict], Optional[str]]
+
+# Errors worth retrying after a pause (network failures, throttling, 5xx),
+# as opposed to malformed responses which need a different prompt
+TRANSIENT_ERRORS: tuple = (OSError, TimeoutError)
+if httpx is not None:
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+if anthropic is not None:
+    TRANSIENT_ERRORS += (
+        anthropic.APIConnectionError,
+        anthropic.RateLimitError,
+        anthropic.InternalServerError,
+    )
+
+
+def _error_response(error: Exception) -> tuple:
+    """
+    Status code and headers of a failed API response.
+
+    Works for urllib, httpx and SDK errors; returns (None, {}) for errors
+    that never got a response, such as connection failures.
+    """
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code, error.headers or {}
+    response = getattr(error, "response", None)
+    if response is not None and hasattr(response, "status_code"):
+        return response.status_code, response.headers
+    return None, {}
+
+
+def _server_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After or rate limit reset headers"""
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(retry_after)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+
+    waits = []
+    for name in RATE_LIMIT_RESET_HEADERS:
+        reset = headers.get(name)
+        if not reset:
+            continue
+        try:
+            when = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        waits.append((when - datetime.now(timezone.utc)).total_seconds())
+
+    return max(0.0, max(waits)) if waits else None
+
+
+def _log_api_error(error: Exception) -> None:
+    """Log a non-retryable API failure with the response body when there is one"""
+    if isinstance(error, urllib.error.HTTPError):
+        error_body = error.read().decode() if error.fp else str(error)
+        logger.error(f"HTTP Error: {error.code} - {error_body}")
+    elif httpx is not None and isinstance(error, httpx.HTTPStatusError):
+        logger.error(f"HTTP Error: {error.response.status_code} - {error.response.text}")
+    else:
+        logger.error(f"API Error: {error}")
+
+
+def _json_loads(data: Any) -> Any:
+    """Parse JSON text or bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _close_truncated_json(text: str) -> str:
+    """
+    Cut JSON text back to the last complete object or array and close
+    whatever brackets are still open, e.g. for a reply cut off by max_tokens.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    cut, closers = 0, ""
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+            cut, closers = i + 1, "".join(reversed(stack))
+            if not stack:
+                break
+
+    return text[:cut] + closers
+
+
+def _repair_json(text: str) -> Any:
+    """
+    Best-effort parse of malformed JSON: trailing commas, prose after the
+    value, or truncation. Uses json_repair when installed.
+    """
+    if json_repair is not None:
+        return json_repair.loads(text)
+
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except json.JSONDecodeError:
+        closed = _TRAILING_COMMA_RE.sub(r"\1", _close_truncated_json(text))
+        return _json_loads(closed)
+
+
+class _JsonArrayItemParser:
+    """
+    Push parser behind iter_json_array_items() and aiter_json_array_items():
+    feed() streamed text in and get back the elements of the array under
+    `key` that have completed so far.
+    """
+
+    def __init__(self, key: str):
+        self._decoder = json.JSONDecoder()
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = -1  # index just past '[' or the last parsed element
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Append a chunk and return the elements it completed"""
+        items: List[Any] = []
+        if self.done:
+            return items
+
+        buffer = self._buffer = self._buffer + chunk
+        if self._pos < 0:
+            match = self._key_re.search(buffer)
+            if not match:
+                return items
+            self._pos = match.end()
+
+        while True:
+            i = self._pos
+            while i < len(buffer) and buffer[i] in " \t\r\n,":
+                i += 1
+            if i >= len(buffer):
+                break
+            if buffer[i] == "]":
+                self.done = True
+                break
+            try:
+                item, i = self._decoder.raw_decode(buffer, i)
+            except json.JSONDecodeError:
+                break  # element still incomplete, wait for more text
+            # A bare number may be cut mid-token; only accept it once a delimiter follows
+            if isinstance(item, (int, float)) and i >= len(buffer):
+                break
+            self._pos = i
+            items.append(item)
+
+        return items
+
 
 class ClaudeClient:
     """
@@ -26,23 +289,311 @@ class ClaudeClient:
         model: str = "claude-sonnet-4-20250514",
         max_tokens: int = 4096,
         temperature: float = 0.3,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY_SECONDS,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        response_cache: Optional["CacheManager"] = None,
     ):
         self.api_key = api_key
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+        # EWMA of seconds per output token over successful calls
+        # (None until the first call completes)
+        self._seconds_per_token: Optional[float] = None
+
+        # Self-pace under the account's rate limits (None = unthrottled)
+        self._request_bucket = TokenBucket.per_minute(rpm) if rpm else None
+        self._token_bucket = TokenBucket.per_minute(tpm) if tpm else None
+
+        # Parsed responses keyed by request content hash (None = no caching)
+        self.response_cache = response_cache
         self.client = None
         self.use_sdk = False
 
+        # Async clients are bound to the event loop they were created on
+        self._async_http = None
+        self._async_client = None
+        self._async_loop = None
+
+        # One pooled HTTP client per ClaudeClient so keep-alive connections
+        # (and their TLS sessions) are reused across calls
+        self._ssl_context = self._build_ssl_context()
+        self._http = self._build_http_client(self._ssl_context)
+        if self._http is not None:
+            # Open the first connection (DNS + TCP + TLS) in the background
+            # so the first real request finds it ready in the pool
+            threading.Thread(target=self._prewarm, daemon=True).start()
+
         # Try to use official SDK
-        try:
-            import anthropic
-            self.client = anthropic.Anthropic(api_key=api_key)
+        if anthropic is not None:
+            # Retries are handled by _with_retry for both transports
+            if self._http is not None:
+                self.client = anthropic.Anthropic(
+                    api_key=api_key, http_client=self._http, max_retries=0
+                )
+            else:
+                self.client = anthropic.Anthropic(api_key=api_key, max_retries=0)
             self.use_sdk = True
             logger.info(f"Using Anthropic SDK with model: {model}")
-        except ImportError:
+        else:
             logger.info("Anthropic SDK not found, using direct HTTP API")
 
+    @staticmethod
+    def _build_ssl_context() -> ssl.SSLContext:
+        """TLS context trusting certifi's CA bundle when installed"""
+        try:
+            import certifi
+            return ssl.create_default_context(cafile=certifi.where())
+        except ImportError:
+            return ssl.create_default_context()
+
+    @staticmethod
+    def _pool_options(ssl_context: ssl.SSLContext) -> Dict[str, Any]:
+        """Keyword arguments shared by the sync and async httpx clients"""
+        return {
+            "http2": importlib.util.find_spec("h2") is not None,
+            "verify": ssl_context,
+            "timeout": HTTP_TIMEOUT_SECONDS,
+            "limits": httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        }
+
+    @classmethod
+    def _build_http_client(cls, ssl_context: ssl.SSLContext) -> Optional["httpx.Client"]:
+        """Create the pooled HTTP client, using HTTP/2 when h2 is installed"""
+        if httpx is None:
+            return None
+
+        return httpx.Client(**cls._pool_options(ssl_context))
+
+    def _prewarm(self) -> None:
+        """Establish a pooled connection to the API host; failures are harmless"""
+        try:
+            self._http.head(f"{API_ORIGIN}/", timeout=MIN_REQUEST_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.debug(f"Connection prewarm failed: {e}")
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        if self._http is not None:
+            self._http.close()
+
+    def _get_async_client(self) -> Any:
+        """
+        Return the async SDK client (or raw httpx.AsyncClient without the SDK)
+        for the running event loop, creating it on first use in that loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_http is None or self._async_loop is not loop:
+            self._async_http = httpx.AsyncClient(**self._pool_options(self._ssl_context))
+            self._async_loop = loop
+            if self.use_sdk:
+                self._async_client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    http_client=self._async_http,
+                    max_retries=0,
+                )
+            else:
+                self._async_client = self._async_http
+
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close the async connection pool for the running event loop"""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+            self._async_client = None
+            self._async_loop = None
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed request, or None if the
+        error is not retryable or retries are exhausted.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        status, headers = _error_response(error)
+        if status is not None:
+            if status not in RETRYABLE_STATUS_CODES:
+                return None
+            server_delay = _server_retry_after(headers)
+            if server_delay is not None:
+                return min(server_delay, MAX_RETRY_DELAY_SECONDS)
+        elif not isinstance(error, TRANSIENT_ERRORS):
+            return None
+
+        delay = min(MAX_RETRY_DELAY_SECONDS, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _with_retry(self, call: Callable[[], T]) -> T:
+        """Run a request, retrying throttled, 5xx and network failures with jittered backoff"""
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    _log_api_error(e)
+                    raise
+                logger.warning(f"Claude request failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt += 1
+
+    async def _awith_retry(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of _with_retry()"""
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    _log_api_error(e)
+                    raise
+                logger.warning(f"Claude request failed ({e}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _request_timeout(self, max_tokens: int) -> float:
+        """Timeout for one attempt at a request allowed `max_tokens` of output"""
+        if self._seconds_per_token is None:
+            return HTTP_TIMEOUT_SECONDS
+
+        expected = self._seconds_per_token * max_tokens
+        timeout = TIMEOUT_LATENCY_MULTIPLIER * expected + TIMEOUT_SLACK_SECONDS
+        return min(HTTP_TIMEOUT_SECONDS, max(MIN_REQUEST_TIMEOUT_SECONDS, timeout))
+
+    def _record_latency(self, elapsed: float, output_tokens: Optional[int]) -> None:
+        """
+        Fold a successful call's duration into the latency estimate.
+
+        Short replies are dominated by time-to-first-token and so overstate
+        the per-token cost, which only makes later timeouts more lenient.
+        """
+        if not output_tokens:
+            return
+        sample = elapsed / output_tokens
+        if self._seconds_per_token is None:
+            self._seconds_per_token = sample
+        else:
+            self._seconds_per_token += LATENCY_EWMA_ALPHA * (sample - self._seconds_per_token)
+
+    @staticmethod
+    def _estimate_input_tokens(messages: List[Dict]) -> int:
+        """Approximate prompt tokens from message length"""
+        return sum(len(str(msg["content"])) for msg in messages) // CHARS_PER_TOKEN
+
+    def _throttle(self, messages: List[Dict]) -> None:
+        """Block until the RPM/TPM buckets allow another request"""
+        if self._request_bucket is not None:
+            self._request_bucket.acquire()
+        if self._token_bucket is not None:
+            self._token_bucket.acquire(self._estimate_input_tokens(messages))
+
+    async def _athrottle(self, messages: List[Dict]) -> None:
+        """Async variant of _throttle()"""
+        if self._request_bucket is not None:
+            await self._request_bucket.aacquire()
+        if self._token_bucket is not None:
+            await self._token_bucket.aacquire(self._estimate_input_tokens(messages))
+
+    @staticmethod
+    def _split_system(messages: List[Dict]) -> tuple:
+        """
+        Separate the system prompt from the conversation messages.
+
+        A plain-text system prompt is returned as a single text block marked
+        for prompt caching, so repeated calls sharing it (and the tool
+        definitions before it) are billed and processed as cache reads.
+        Prompts already given as content blocks are passed through as-is.
+        """
+        system_content = None
+        user_messages = []
+
+        for msg in messages:
+            if msg["role"] == "system":
+                system_content = msg["content"]
+            else:
+                user_messages.append(msg)
+
+        if isinstance(system_content, str) and system_content:
+            system_content = [{
+                "type": "text",
+                "text": system_content,
+                "cache_control": {"type": "ephemeral"},
+            }]
+
+        return system_content, user_messages
+
+    @staticmethod
+    def _tool_params(tool: Optional[Dict]) -> Dict[str, Any]:
+        """Request params that force Claude to answer through a single tool"""
+        if tool is None:
+            return {}
+        return {
+            "tools": [tool],
+            "tool_choice": {"type": "tool", "name": tool["name"]},
+        }
+
+    def _api_headers(self) -> Dict[str, str]:
+        """Headers for direct Messages API requests"""
+        return {
+            "x-api-key": self.api_key,
+            "anthropic-version": API_VERSION,
+            "Content-Type": "application/json",
+        }
+
+    def _build_payload(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Messages API request body for direct HTTP calls"""
+        system_content, user_messages = self._split_system(messages)
+
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": user_messages,
+            "temperature": temperature,
+            **params,
+        }
+        if system_content:
+            payload["system"] = system_content
+
+        return payload
+
+    def _create(
+        self,
+        messages: List[Dict],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        **params: Any,
+    ) -> List[Dict]:
+        """Send a messages request and return the response content blocks"""
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+
+        self._throttle(messages)
+
+        if self.use_sdk:
+            return self._sdk_call(messages, temp, tokens, **params)
+        else:
+            return self._http_call(messages, temp, tokens, **params)
+
     def chat(
         self,
         messages: List[Dict],
@@ -60,106 +611,373 @@ class ClaudeClient:
         Returns:
             Response text from Claude
         """
+        blocks = self._create(messages, temperature, max_tokens)
+        return "".join(b.get("text", "") for b in blocks if b.get("type") == "text")
+
+    def call_tool(
+        self,
+        messages: List[Dict],
+        tool: Dict,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict:
+        """
+        Make a call that forces Claude to respond through a tool.
+
+        The tool's input_schema constrains the output, so the returned
+        input is already a dict and needs no JSON extraction.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tool: Tool definition with 'name', 'description' and 'input_schema'
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+
+        Returns:
+            Input Claude passed to the tool, or empty dict if it did not call it
+        """
+        blocks = self._create(messages, temperature, max_tokens, **self._tool_params(tool))
+        return self._tool_input(blocks, tool)
+
+    @staticmethod
+    def _tool_input(blocks: List[Dict], tool: Dict) -> Dict:
+        """Input of the forced tool call in a response, or empty dict if absent"""
+        for block in blocks:
+            if block.get("type") == "tool_use" and block.get("name") == tool["name"]:
+                return block.get("input") or {}
+
+        logger.error(f"Claude did not call tool {tool['name']}")
+        return {}
+
+    def _sdk_call(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        **params: Any,
+    ) -> List[Dict]:
+        """Use official Anthropic SDK"""
+        system_content, user_messages = self._split_system(messages)
+
+        def attempt() -> Any:
+            started = time.monotonic()
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system_content if system_content else "",
+                messages=user_messages,
+                temperature=temperature,
+                timeout=self._request_timeout(max_tokens),
+                **params,
+            )
+            self._record_latency(time.monotonic() - started, response.usage.output_tokens)
+            return response
+
+        response = self._with_retry(attempt)
+        return [block.model_dump() for block in response.content]
+
+    def _http_call(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        **params: Any,
+    ) -> List[Dict]:
+        """Direct HTTP API call (fallback)"""
+        payload = self._build_payload(messages, temperature, max_tokens, **params)
+        data = _json_dumps(payload)
+
+        def attempt() -> Dict:
+            started = time.monotonic()
+            result = self._http_post(data, self._request_timeout(max_tokens))
+            self._record_latency(
+                time.monotonic() - started, result.get("usage", {}).get("output_tokens")
+            )
+            return result
+
+        return self._with_retry(attempt)["content"]
+
+    def _http_post(self, data: bytes, timeout: float = HTTP_TIMEOUT_SECONDS) -> Dict:
+        """POST one request body to the Messages API"""
+        return _json_loads(self._http_request(API_URL, data, timeout))
+
+    def _http_request(
+        self,
+        url: str,
+        data: Optional[bytes] = None,
+        timeout: float = HTTP_TIMEOUT_SECONDS,
+    ) -> bytes:
+        """
+        Send an API request (POST when there is a body, else GET) and
+        return the raw response body.
+
+        Goes through the pooled httpx client when available so the TLS
+        session is reused, otherwise a one-off urllib request.
+        """
+        headers = self._api_headers()
+        method = "POST" if data is not None else "GET"
+
+        if self._http is not None:
+            response = self._http.request(method, url, content=data, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(req, context=self._ssl_context, timeout=timeout) as response:
+            return response.read()
+
+    async def _acreate(
+        self,
+        messages: List[Dict],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        **params: Any,
+    ) -> List[Dict]:
+        """Async counterpart of _create()"""
+        if httpx is None:
+            # No async transport available; keep the event loop free instead
+            return await asyncio.to_thread(
+                self._create, messages, temperature, max_tokens, **params
+            )
+
         temp = temperature if temperature is not None else self.temperature
         tokens = max_tokens if max_tokens is not None else self.max_tokens
+        client = self._get_async_client()
+
+        await self._athrottle(messages)
 
         if self.use_sdk:
-            return self._sdk_call(messages, temp, tokens)
-        else:
-            return self._http_call(messages, temp, tokens)
+            system_content, user_messages = self._split_system(messages)
 
-    def _sdk_call(
+            async def attempt() -> Any:
+                started = time.monotonic()
+                response = await client.messages.create(
+                    model=self.model,
+                    max_tokens=tokens,
+                    system=system_content if system_content else "",
+                    messages=user_messages,
+                    temperature=temp,
+                    timeout=self._request_timeout(tokens),
+                    **params,
+                )
+                self._record_latency(time.monotonic() - started, response.usage.output_tokens)
+                return response
+
+            response = await self._awith_retry(attempt)
+            return [block.model_dump() for block in response.content]
+
+        return await self._ahttp_call(client, messages, temp, tokens, **params)
+
+    async def _ahttp_call(
         self,
+        client: "httpx.AsyncClient",
         messages: List[Dict],
         temperature: float,
         max_tokens: int,
+        **params: Any,
+    ) -> List[Dict]:
+        """Direct async HTTP API call (fallback)"""
+        payload = self._build_payload(messages, temperature, max_tokens, **params)
+        data = _json_dumps(payload)
+
+        async def post() -> Dict:
+            started = time.monotonic()
+            response = await client.post(
+                API_URL,
+                content=data,
+                headers=self._api_headers(),
+                timeout=self._request_timeout(max_tokens),
+            )
+            response.raise_for_status()
+            result = _json_loads(response.content)
+            self._record_latency(
+                time.monotonic() - started, result.get("usage", {}).get("output_tokens")
+            )
+            return result
+
+        return (await self._awith_retry(post))["content"]
+
+    async def achat(
+        self,
+        messages: List[Dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
     ) -> str:
-        """Use official Anthropic SDK"""
-        # Extract system message
-        system_content = None
-        user_messages = []
+        """
+        Async variant of chat(), sharing one connection pool across
+        concurrent calls on the same event loop.
+        """
+        blocks = await self._acreate(messages, temperature, max_tokens)
+        return "".join(b.get("text", "") for b in blocks if b.get("type") == "text")
 
-        for msg in messages:
-            if msg["role"] == "system":
-                system_content = msg["content"]
+    async def acall_tool(
+        self,
+        messages: List[Dict],
+        tool: Dict,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict:
+        """Async variant of call_tool()"""
+        blocks = await self._acreate(messages, temperature, max_tokens, **self._tool_params(tool))
+        return self._tool_input(blocks, tool)
+
+    def chat_stream(
+        self,
+        messages: List[Dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        tool: Optional[Dict] = None,
+    ) -> Iterator[str]:
+        """
+        Stream a chat completion from Claude as text chunks.
+
+        When a tool is given, the chunks are the tool input JSON as it
+        arrives. Falls back to a single chunk when the SDK is unavailable.
+        """
+        if not self.use_sdk:
+            if tool is not None:
+                yield _json_dumps(self.call_tool(messages, tool, temperature, max_tokens)).decode("utf-8")
             else:
-                user_messages.append(msg)
+                yield self.chat(messages, temperature, max_tokens)
+            return
+
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+        system_content, user_messages = self._split_system(messages)
+
+        self._throttle(messages)
 
-        response = self.client.messages.create(
+        with self.client.messages.stream(
             model=self.model,
-            max_tokens=max_tokens,
+            max_tokens=tokens,
             system=system_content if system_content else "",
             messages=user_messages,
-            temperature=temperature,
-        )
-        return response.content[0].text
+            temperature=temp,
+            **self._tool_params(tool),
+        ) as stream:
+            for event in stream:
+                if event.type != "content_block_delta":
+                    continue
+                if event.delta.type == "text_delta":
+                    yield event.delta.text
+                elif event.delta.type == "input_json_delta":
+                    yield event.delta.partial_json
 
-    def _http_call(
+    async def achat_stream(
         self,
         messages: List[Dict],
-        temperature: float,
-        max_tokens: int,
-    ) -> str:
-        """Direct HTTP API call (fallback)"""
-        try:
-            import certifi
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-        except ImportError:
-            ssl_context = ssl.create_default_context()
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        tool: Optional[Dict] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of chat_stream().
 
-        url = "https://api.anthropic.com/v1/messages"
+        Opening the stream is retried like any other request; once text has
+        started arriving, errors propagate to the caller.
+        """
+        if not self.use_sdk or httpx is None:
+            if tool is not None:
+                result = await self.acall_tool(messages, tool, temperature, max_tokens)
+                yield _json_dumps(result).decode("utf-8")
+            else:
+                yield await self.achat(messages, temperature, max_tokens)
+            return
 
-        # Extract system message
-        system_content = None
-        user_messages = []
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+        system_content, user_messages = self._split_system(messages)
+        client = self._get_async_client()
 
-        for msg in messages:
-            if msg["role"] == "system":
-                system_content = msg["content"]
-            else:
-                user_messages.append(msg)
+        await self._athrottle(messages)
 
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
-        }
+        async with contextlib.AsyncExitStack() as stack:
+            async def attempt() -> Any:
+                return await stack.enter_async_context(client.messages.stream(
+                    model=self.model,
+                    max_tokens=tokens,
+                    system=system_content if system_content else "",
+                    messages=user_messages,
+                    temperature=temp,
+                    **self._tool_params(tool),
+                ))
 
-        payload = {
-            "model": self.model,
-            "max_tokens": max_tokens,
-            "messages": user_messages,
-            "temperature": temperature,
-        }
-        if system_content:
-            payload["system"] = system_content
+            stream = await self._awith_retry(attempt)
+            async for event in stream:
+                if event.type != "content_block_delta":
+                    continue
+                if event.delta.type == "text_delta":
+                    yield event.delta.text
+                elif event.delta.type == "input_json_delta":
+                    yield event.delta.partial_json
 
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+    @staticmethod
+    def iter_json_fields(chunks: Iterable[str]) -> Iterator[Dict]:
+        """
+        Incrementally parse a streamed top-level JSON object.
 
-        max_retries = 3
-        base_delay = 2
+        Yields the object built so far each time another top-level key
+        finishes arriving, so callers can act on early keys before the
+        response completes.
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        pos = -1  # index just past '{' or the last parsed value
+        result: Dict = {}
 
-        for attempt in range(max_retries):
-            try:
-                with urllib.request.urlopen(req, context=ssl_context, timeout=180) as response:
-                    result = json.loads(response.read().decode("utf-8"))
-                    return result["content"][0]["text"]
-            except urllib.error.HTTPError as e:
-                if e.code == 429:
-                    delay = base_delay * (2 ** attempt)
-                    logger.warning(f"Rate limited, waiting {delay}s...")
-                    time.sleep(delay)
+        for chunk in chunks:
+            buffer += chunk
+            if pos < 0:
+                start = buffer.find("{")
+                if start == -1:
                     continue
-                else:
-                    error_body = e.read().decode() if e.fp else str(e)
-                    logger.error(f"HTTP Error: {e.code} - {error_body}")
-                    raise
-            except Exception as e:
-                logger.error(f"API Error: {e}")
-                raise
+                pos = start + 1
+
+            updated = False
+            while True:
+                i = pos
+                while i < len(buffer) and buffer[i] in " \t\r\n,":
+                    i += 1
+                if i >= len(buffer) or buffer[i] == "}":
+                    break
+                try:
+                    key, i = decoder.raw_decode(buffer, i)
+                    while i < len(buffer) and buffer[i] in " \t\r\n:":
+                        i += 1
+                    value, i = decoder.raw_decode(buffer, i)
+                except json.JSONDecodeError:
+                    break  # value still incomplete, wait for more text
+                # A bare number may be cut mid-token; only accept it once a delimiter follows
+                if isinstance(value, (int, float)) and i >= len(buffer):
+                    break
+                result[key] = value
+                pos = i
+                updated = True
 
-        raise Exception("Max retries exceeded")
+            if updated:
+                yield dict(result)
+
+    @staticmethod
+    def iter_json_array_items(chunks: Iterable[str], key: str) -> Iterator[Any]:
+        """
+        Incrementally parse the array stored under `key` in a streamed
+        JSON object, yielding each element as soon as it is complete.
+        """
+        parser = _JsonArrayItemParser(key)
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+            if parser.done:
+                return
+
+    @staticmethod
+    async def aiter_json_array_items(chunks: AsyncIterable[str], key: str) -> AsyncIterator[Any]:
+        """Async variant of iter_json_array_items()"""
+        parser = _JsonArrayItemParser(key)
+        async for chunk in chunks:
+            for item in parser.feed(chunk):
+                yield item
+            if parser.done:
+                return
 
     def parse_json_response(self, response: str) -> Dict:
         """
@@ -168,33 +986,96 @@ class ClaudeClient:
         Handles markdown code blocks and common formatting issues.
         """
         # Try to find JSON in code blocks
-        json_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", response)
+        json_match = _CODE_BLOCK_RE.search(response)
         if json_match:
             response = json_match.group(1)
 
         # Clean common issues
         response = response.strip()
-        if not response.startswith("{") and not response.startswith("["):
+        if not response.startswith(("{", "[")):
             # Find first { or [
-            start = min(
-                response.find("{") if response.find("{") != -1 else len(response),
-                response.find("[") if response.find("[") != -1 else len(response),
-            )
-            if start < len(response):
-                response = response[start:]
+            start_match = _JSON_START_RE.search(response)
+            if start_match:
+                response = response[start_match.start():]
 
         try:
-            return json.loads(response)
+            return _json_loads(response)
         except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            logger.debug(f"Response: {response[:500]}...")
-            return {}
+            error = e
+
+        try:
+            repaired = _repair_json(response)
+        except json.JSONDecodeError:
+            repaired = None
+        if isinstance(repaired, (dict, list)) and repaired:
+            logger.warning(f"Recovered malformed JSON response ({error})")
+            return repaired
+
+        logger.error(f"JSON parse error: {error}")
+        logger.debug(f"Response: {response[:500]}...")
+        return {}
+
+    def _response_cache_key(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: Optional[float],
+        tool: Optional[Dict],
+        max_tokens: Optional[int],
+    ) -> Optional[str]:
+        """Hash of everything that determines a response, or None without a cache"""
+        if self.response_cache is None:
+            return None
+
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+        tool_spec = _json_dumps(tool).decode("utf-8") if tool is not None else ""
+
+        return self.response_cache.response_key(
+            self.model, system_prompt, user_prompt, str(temp), str(tokens), tool_spec
+        )
+
+    def _cached_response(
+        self,
+        cache_key: Optional[str],
+        validate: Optional[ResponseValidator] = None,
+    ) -> Optional[Dict]:
+        """Look up a cached parsed response, ignoring entries `validate` rejects"""
+        if cache_key is None:
+            return None
+
+        cached = self.response_cache.get_response_cache(cache_key)
+        if cached is None:
+            return None
+        if validate is not None and validate(cached) is not None:
+            logger.debug(f"Ignoring invalid cached response: {cache_key[:12]}")
+            return None
+
+        logger.debug(f"Response cache hit: {cache_key[:12]}")
+        return cached
+
+    def _store_response(
+        self,
+        cache_key: Optional[str],
+        response: Dict,
+        validate: Optional[ResponseValidator] = None,
+    ) -> None:
+        """Cache a parsed response; empty (failed) or invalid responses are not kept"""
+        if cache_key is None or not response:
+            return
+        if validate is not None and validate(response) is not None:
+            return
+        self.response_cache.set_response_cache(cache_key, response)
 
     def analyze(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: Optional[float] = None,
+        tool: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        validate: Optional[ResponseValidator] = None,
     ) -> Dict:
         """
         Convenience method for analysis calls.
@@ -203,14 +1084,316 @@ class ClaudeClient:
             system_prompt: System context
             user_prompt: User query
             temperature: Optional temperature override
+            tool: Optional tool definition; when given, Claude must answer
+                through it and its schema-valid input is returned
+            max_tokens: Optional max tokens override
+            use_cache: Serve identical requests from the response cache
+            validate: Optional check of the parsed response; responses it
+                rejects are neither served from nor written to the cache
 
         Returns:
             Parsed JSON response
         """
+        cache_key = None
+        if use_cache:
+            cache_key = self._response_cache_key(system_prompt, user_prompt, temperature, tool, max_tokens)
+            cached = self._cached_response(cache_key, validate)
+            if cached is not None:
+                return cached
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        if tool is not None:
+            result = self.call_tool(messages, tool, temperature=temperature, max_tokens=max_tokens)
+        else:
+            response = self.chat(messages, temperature=temperature, max_tokens=max_tokens)
+            result = self.parse_json_response(response)
+
+        self._store_response(cache_key, result, validate)
+        return result
+
+    def analyze_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: Optional[float] = None,
+        tool: Optional[Dict] = None,
+    ) -> Iterator[Dict]:
+        """
+        Streaming variant of analyze().
+
+        Yields the partially parsed JSON response each time a top-level
+        key completes; the last item is the full response.
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        return self.iter_json_fields(
+            self.chat_stream(messages, temperature=temperature, tool=tool)
+        )
+
+    def analyze_stream_items(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        key: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        validate: Optional[ResponseValidator] = None,
+    ) -> Iterator[Any]:
+        """
+        Streaming variant of analyze() for responses that are one large array.
+
+        Shares response cache entries with analyze(): a cached response is
+        replayed item by item, and a completed stream is cached as {key: items}.
+
+        Args:
+            system_prompt: System context
+            user_prompt: User query
+            key: Top-level key holding the array
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            use_cache: Serve identical requests from the response cache
+            validate: Optional check of the complete {key: items} response;
+                responses it rejects are neither served from nor written to the cache
+
+        Returns:
+            Iterator over the array elements in the order they arrive
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = self._response_cache_key(system_prompt, user_prompt, temperature, None, max_tokens)
+            cached = self._cached_response(cache_key, validate)
+            if cached is not None:
+                yield from cached.get(key, [])
+                return
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        items = []
+        for item in self.iter_json_array_items(
+            self.chat_stream(messages, temperature=temperature, max_tokens=max_tokens), key
+        ):
+            items.append(item)
+            yield item
+
+        self._store_response(cache_key, {key: items} if items else {}, validate)
+
+    async def aanalyze_stream_items(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        key: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        validate: Optional[ResponseValidator] = None,
+    ) -> AsyncIterator[Any]:
+        """Async variant of analyze_stream_items()"""
+        cache_key = None
+        if use_cache:
+            cache_key = self._response_cache_key(system_prompt, user_prompt, temperature, None, max_tokens)
+            cached = self._cached_response(cache_key, validate)
+            if cached is not None:
+                for item in cached.get(key, []):
+                    yield item
+                return
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        items = []
+        async for item in self.aiter_json_array_items(
+            self.achat_stream(messages, temperature=temperature, max_tokens=max_tokens), key
+        ):
+            items.append(item)
+            yield item
+
+        self._store_response(cache_key, {key: items} if items else {}, validate)
+
+    async def aanalyze(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: Optional[float] = None,
+        tool: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        validate: Optional[ResponseValidator] = None,
+    ) -> Dict:
+        """Async variant of analyze()"""
+        cache_key = None
+        if use_cache:
+            cache_key = self._response_cache_key(system_prompt, user_prompt, temperature, tool, max_tokens)
+            cached = self._cached_response(cache_key, validate)
+            if cached is not None:
+                return cached
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        if tool is not None:
+            result = await self.acall_tool(messages, tool, temperature=temperature, max_tokens=max_tokens)
+        else:
+            response = await self.achat(messages, temperature=temperature, max_tokens=max_tokens)
+            result = self.parse_json_response(response)
+
+        self._store_response(cache_key, result, validate)
+        return result
+
+    def batch_request(
+        self,
+        custom_id: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: Optional[float] = None,
+        tool: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict:
+        """One entry of a Message Batches submission, built like an analyze() call"""
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+
+        return {
+            "custom_id": custom_id,
+            "params": self._build_payload(messages, temp, tokens, **self._tool_params(tool)),
+        }
+
+    def submit_batch(self, requests: List[Dict]) -> str:
+        """
+        Submit requests to the Message Batches API.
+
+        Batched requests are billed at half price and run in parallel
+        server-side, but results are only available once the whole
+        batch has ended.
+
+        Args:
+            requests: Entries built by batch_request()
+
+        Returns:
+            Batch id to pass to poll_batch()
+        """
+        data = _json_dumps({"requests": requests})
+        batch = self._with_retry(lambda: _json_loads(self._http_request(BATCHES_URL, data)))
+
+        logger.info(f"Submitted message batch {batch['id']} with {len(requests)} requests")
+        return batch["id"]
+
+    def poll_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+        max_wait: float = BATCH_MAX_WAIT_SECONDS,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Wait for a message batch to end and collect its results.
+
+        Args:
+            batch_id: Id returned by submit_batch()
+            poll_interval: Seconds between status checks
+            max_wait: Seconds to wait before canceling the batch
+
+        Returns:
+            Response content blocks by custom_id; errored, canceled and
+            expired requests are left out
+
+        Raises:
+            TimeoutError: If the batch has not ended within max_wait
+        """
+        url = f"{BATCHES_URL}/{batch_id}"
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            batch = self._with_retry(lambda: _json_loads(self._http_request(url)))
+            if batch["processing_status"] == "ended":
+                break
+            if time.monotonic() >= deadline:
+                self._with_retry(lambda: self._http_request(f"{url}/cancel", b""))
+                raise TimeoutError(f"Message batch {batch_id} did not end within {max_wait:.0f}s")
+            time.sleep(poll_interval)
+
+        # Results are JSON Lines, one entry per request in no particular order
+        body = self._with_retry(lambda: self._http_request(batch["results_url"]))
+        results = {}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            entry = _json_loads(line)
+            result = entry["result"]
+            if result["type"] == "succeeded":
+                results[entry["custom_id"]] = result["message"]["content"]
+            else:
+                logger.warning(f"Batch request {entry['custom_id']} {result['type']}")
+
+        logger.info(f"Message batch {batch_id} ended: {len(results)} succeeded")
+        return results
+
+    def analyze_batch(
+        self,
+        system_prompt: str,
+        user_prompts: Dict[str, str],
+        temperature: Optional[float] = None,
+        tool: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Batch variant of analyze(): run many prompts sharing one system
+        prompt as a single Message Batches job.
+
+        Args:
+            system_prompt: System context shared by every request
+            user_prompts: User prompt per custom_id (1-64 chars of
+                letters, digits, '-' and '_')
+            temperature: Optional temperature override
+            tool: Optional tool definition to answer through
+            max_tokens: Optional max tokens override
+
+        Returns:
+            Parsed response per custom_id; ids whose request failed are missing
+        """
+        results = {}
+        cache_keys = {}
+        requests = []
+
+        for custom_id, user_prompt in user_prompts.items():
+            cache_key = self._response_cache_key(system_prompt, user_prompt, temperature, tool, max_tokens)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                results[custom_id] = cached
+                continue
+            cache_keys[custom_id] = cache_key
+            requests.append(self.batch_request(
+                custom_id, system_prompt, user_prompt, temperature, tool, max_tokens
+            ))
+
+        if not requests:
+            return results
+
+        for custom_id, blocks in self.poll_batch(self.submit_batch(requests)).items():
+            if tool is not None:
+                result = self._tool_input(blocks, tool)
+            else:
+                text = "".join(b.get("text", "") for b in blocks if b.get("type") == "text")
+                result = self.parse_json_response(text)
+
+            self._store_response(cache_keys.get(custom_id), result)
+            results[custom_id] = result
 
-        response = self.chat(messages, temperature=temperature)
-        return self.parse_json_response(response)
+        return results
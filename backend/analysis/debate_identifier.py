@@ -4,16 +4,54 @@ Debate identification using Claude
 Identifies which user comments are part of actual debates vs casual discussion.
 """
 
+import io
+import os
+import asyncio
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
-from analysis.claude_client import ClaudeClient
+from analysis.claude_client import ClaudeClient, CHARS_PER_TOKEN
 from models.user_profile import DebateThread, DebateMetadata, RedditComment
 
 logger = logging.getLogger(__name__)
 
-
+# Batches sent to Claude at once by aidentify_debates
+MAX_CONCURRENT_BATCHES = 8
+
+# Batches are as large as possible (the cached system prompt makes each
+# extra thread cheap) while keeping the prompt well under the context window
+DEFAULT_BATCH_SIZE = 30
+MAX_BATCH_INPUT_TOKENS = 150_000
+
+# Thread count above which prompt formatting is spread over worker processes.
+# Workers are spawned rather than forked, since the API process already runs
+# threads and holds open connection pools, and are capped because several
+# pipelines may format at once.
+PARALLEL_FORMAT_MIN_THREADS = 500
+PARALLEL_FORMAT_CHUNKSIZE = 32
+PARALLEL_FORMAT_MAX_WORKERS = 4
+
+# Output budget per classified thread, used to size max_tokens
+OUTPUT_TOKENS_PER_THREAD = 200
+
+# DebateMetadata values used for keys missing from Claude's response;
+# also the set of response keys DebateMetadata accepts
+_METADATA_DEFAULTS: Dict[str, Any] = {
+    "topic": "",
+    "topic_category": "other",
+    "user_position": None,
+    "opponent_position": None,
+    "exchange_depth": 0,
+    "is_ongoing": False,
+    "apparent_outcome": "unresolved",
+}
+
+
+# Everything that does not vary between batches lives in the system prompt
+# so it is served from Anthropic's prompt cache after the first call
 SYSTEM_PROMPT = """You are an expert at identifying argumentative debates in online discussions.
 
 Your task is to analyze Reddit comments and determine which are part of substantive debates
@@ -21,10 +59,7 @@ Your task is to analyze Reddit comments and determine which are part of substant
 simple Q&A, or agreement without argumentation.
 
 You analyze the structure, content, and context to make accurate classifications.
-Always respond with valid JSON matching the requested schema."""
-
-
-DEBATE_IDENTIFICATION_PROMPT = """Analyze these Reddit comments from user "{username}" and identify which are part of debates.
+Always respond with valid JSON matching the requested schema.
 
 For each thread, determine:
 1. Is this a debate? (argumentative exchange with opposing views)
@@ -43,20 +78,16 @@ A comment is NOT a debate if:
 - Off-topic or joking
 - One-sided statements with no opposition
 
-## Comments to Analyze
-
-{threads_text}
-
 ## Required JSON Output
 
 Return a JSON object with this structure:
-{{
+{
     "debates": [
-        {{
+        {
             "thread_id": "abc123",
             "is_debate": true,
             "confidence": 0.92,
-            "metadata": {{
+            "metadata": {
                 "topic": "Climate policy effectiveness",
                 "topic_category": "politics",
                 "user_position": "Pro nuclear energy as part of clean energy mix",
@@ -64,16 +95,16 @@ Return a JSON object with this structure:
                 "exchange_depth": 5,
                 "is_ongoing": false,
                 "apparent_outcome": "unresolved"
-            }}
-        }},
-        {{
+            }
+        },
+        {
             "thread_id": "def456",
             "is_debate": false,
             "confidence": 0.88,
             "reason": "Casual agreement with no opposing views"
-        }}
+        }
     ]
-}}
+}
 
 For apparent_outcome, use one of:
 - "user_won" - User's position gained clear advantage (opponent conceded, delta awarded, etc.)
@@ -83,12 +114,56 @@ For apparent_outcome, use one of:
 - "ongoing" - Exchange still continuing
 
 Topic categories should be one of:
-politics, technology, science, philosophy, ethics, economics, social, entertainment, sports, other
+politics, technology, science, philosophy, ethics, economics, social, entertainment, sports, other"""
+
+
+DEBATE_IDENTIFICATION_PROMPT = """Analyze these Reddit comments from user "{username}" and identify which are part of debates.
+
+## Comments to Analyze
+
+{threads_text}
 
 Analyze all {thread_count} threads and classify each one."""
 
 
-@dataclass
+def _format_thread(thread: DebateThread, max_comments: int) -> str:
+    """
+    Format a single thread for the prompt.
+
+    Module-level so it can run in ProcessPoolExecutor workers.
+    """
+    buf = io.StringIO()
+    w = buf.write
+
+    w(
+        f"\n=== Thread: {thread.thread_id} ===\n"
+        f"Title: {thread.thread_title[:100]}\n"
+        f"Subreddit: r/{thread.subreddit}\n"
+        f"User is OP: {thread.user_is_op}\n"
+        f"User comment count: {thread.user_comment_count}\n"
+        "\n"
+        "User's comments:\n"
+    )
+
+    for comment in thread.user_comments[:max_comments]:
+        # Truncate long comments
+        body = comment.body
+        if len(body) > 500:
+            body = body[:500] + "..."
+        w(f"  [{comment.id}] (depth: {comment.depth}, score: {comment.score})\n    {body}\n\n")
+
+    if thread.opponent_comments:
+        w("Opponent comments in exchange:\n")
+        for comment in thread.opponent_comments[:5]:
+            body = comment.body
+            if len(body) > 300:
+                body = body[:300] + "..."
+            w(f"  u/{comment.author} [{comment.id}]:\n    {body}\n\n")
+
+    return buf.getvalue()
+
+
+@dataclass(slots=True)
 class DebateIdentificationResult:
     """Result of debate identification"""
     thread_id: str
@@ -108,6 +183,24 @@ class DebateIdentifier:
 
     def __init__(self, claude_client: ClaudeClient):
         self.client = claude_client
+        # Formatted prompt text for the current identification run; reused
+        # when a thread is sized for batching, re-batched or retried.
+        # Cleared at the start of each run so it never outlives its threads.
+        self._prompt_fragments: Dict[tuple, str] = {}
+
+    @staticmethod
+    def _fragment_key(thread: DebateThread, max_comments: int) -> tuple:
+        """
+        Memo key covering everything _format_thread renders that varies
+        between users or refetches of the same Reddit thread.
+        """
+        return (
+            thread.thread_id,
+            max_comments,
+            thread.user_is_op,
+            tuple(c.id for c in thread.user_comments),
+            tuple(c.id for c in thread.opponent_comments),
+        )
 
     def _format_thread_for_prompt(
         self,
@@ -115,134 +208,247 @@ class DebateIdentifier:
         max_comments: int = 10,
     ) -> str:
         """Format a single thread for the prompt"""
-        lines = [
-            f"\n=== Thread: {thread.thread_id} ===",
-            f"Title: {thread.thread_title[:100]}",
-            f"Subreddit: r/{thread.subreddit}",
-            f"User is OP: {thread.user_is_op}",
-            f"User comment count: {thread.user_comment_count}",
-            "",
-            "User's comments:",
-        ]
+        key = self._fragment_key(thread, max_comments)
+        cached = self._prompt_fragments.get(key)
+        if cached is not None:
+            return cached
 
-        for i, comment in enumerate(thread.user_comments[:max_comments]):
-            lines.append(f"  [{comment.id}] (depth: {comment.depth}, score: {comment.score})")
-            # Truncate long comments
-            body = comment.body[:500]
-            if len(comment.body) > 500:
-                body += "..."
-            lines.append(f"    {body}")
-            lines.append("")
-
-        if thread.opponent_comments:
-            lines.append("Opponent comments in exchange:")
-            for comment in thread.opponent_comments[:5]:
-                lines.append(f"  u/{comment.author} [{comment.id}]:")
-                body = comment.body[:300]
-                if len(comment.body) > 300:
-                    body += "..."
-                lines.append(f"    {body}")
-                lines.append("")
-
-        return "\n".join(lines)
+        fragment = _format_thread(thread, max_comments)
+        self._prompt_fragments[key] = fragment
+        return fragment
+
+    def _preformat_threads(
+        self,
+        threads: List[DebateThread],
+        max_comments: int = 10,
+    ) -> None:
+        """
+        Format uncached threads in a process pool when there are enough of
+        them to outweigh the cost of starting workers and pickling threads.
+        """
+        pending = [
+            t for t in threads
+            if self._fragment_key(t, max_comments) not in self._prompt_fragments
+        ]
+        if len(pending) < PARALLEL_FORMAT_MIN_THREADS:
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=min(PARALLEL_FORMAT_MAX_WORKERS, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            fragments = executor.map(
+                _format_thread,
+                pending,
+                [max_comments] * len(pending),
+                chunksize=PARALLEL_FORMAT_CHUNKSIZE,
+            )
+            for thread, fragment in zip(pending, fragments):
+                self._prompt_fragments[self._fragment_key(thread, max_comments)] = fragment
 
     def identify_debates(
         self,
         username: str,
         threads: List[DebateThread],
-        batch_size: int = 10,
+        batch_size: int = DEFAULT_BATCH_SIZE,
     ) -> List[DebateThread]:
         """
         Identify which threads contain debates.
 
+        Batches are sent concurrently via aidentify_debates(). Inside a
+        running event loop, await aidentify_debates() directly instead.
+
         Args:
             username: The user being analyzed
             threads: List of threads to analyze
-            batch_size: Number of threads per Claude call
+            batch_size: Maximum threads per Claude call (batches are also
+                capped at MAX_BATCH_INPUT_TOKENS of prompt)
 
         Returns:
-            Updated DebateThread objects with is_debate and metadata set
+            The same threads, updated in place with is_debate and metadata set
+
+        Raises:
+            RuntimeError: If called from a running event loop
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._identify_and_close(username, threads, batch_size))
+
+        raise RuntimeError(
+            "identify_debates() would block the running event loop; "
+            "await aidentify_debates() instead"
+        )
+
+    async def _identify_and_close(
+        self,
+        username: str,
+        threads: List[DebateThread],
+        batch_size: int,
+    ) -> List[DebateThread]:
+        """Run aidentify_debates on a throwaway loop, then release its connections"""
+        try:
+            return await self.aidentify_debates(username, threads, batch_size)
+        finally:
+            await self.client.aclose()
+
+    async def aidentify_debates(
+        self,
+        username: str,
+        threads: List[DebateThread],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_concurrency: int = MAX_CONCURRENT_BATCHES,
+    ) -> List[DebateThread]:
+        """
+        Async variant of identify_debates() that sends batches concurrently.
+
+        Args:
+            username: The user being analyzed
+            threads: List of threads to analyze
+            batch_size: Maximum threads per Claude call
+            max_concurrency: Maximum batches in flight at once
+
+        Returns:
+            The same threads, updated in place with is_debate and metadata set
         """
         logger.info(f"Identifying debates for u/{username} across {len(threads)} threads")
 
-        results = {}
+        self._prompt_fragments.clear()
+        sem = asyncio.Semaphore(max_concurrency)
+        # Planning formats every thread; keep that CPU work off the event loop
+        batches = await asyncio.to_thread(self._plan_batches, threads, batch_size)
 
-        # Process in batches
-        for i in range(0, len(threads), batch_size):
-            batch = threads[i:i + batch_size]
-            batch_results = self._analyze_batch(username, batch)
+        threads_by_id = {t.thread_id: t for t in threads}
+        debates_found = sum(t.is_debate for t in threads)
 
-            for result in batch_results:
-                results[result.thread_id] = result
+        # Each batch applies its results to the threads as Claude streams them
+        debates_found += sum(await asyncio.gather(*(
+            self._aanalyze_batch(username, batch, threads_by_id, sem) for batch in batches
+        )))
 
-        # Update thread objects
-        updated_threads = []
-        for thread in threads:
-            result = results.get(thread.thread_id)
-            if result:
-                thread.is_debate = result.is_debate
-                thread.confidence = result.confidence
-                thread.metadata = result.metadata
-            updated_threads.append(thread)
-
-        debates_found = sum(1 for t in updated_threads if t.is_debate)
         logger.info(f"Identified {debates_found} debates out of {len(threads)} threads")
+        return threads
+
+    def _plan_batches(
+        self,
+        threads: List[DebateThread],
+        batch_size: int,
+    ) -> List[List[DebateThread]]:
+        """
+        Split threads into batches of at most batch_size threads whose
+        formatted text stays within MAX_BATCH_INPUT_TOKENS.
+        """
+        self._preformat_threads(threads)
+
+        batches = []
+        batch = []
+        batch_tokens = 0
 
-        return updated_threads
+        for thread in threads:
+            tokens = len(self._format_thread_for_prompt(thread)) // CHARS_PER_TOKEN
+            if batch and (len(batch) >= batch_size or batch_tokens + tokens > MAX_BATCH_INPUT_TOKENS):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(thread)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    def _batch_max_tokens(self, threads: List[DebateThread]) -> int:
+        """Output token limit large enough for one result per thread"""
+        return max(self.client.max_tokens, len(threads) * OUTPUT_TOKENS_PER_THREAD)
+
+    @staticmethod
+    def _apply_result(
+        threads_by_id: Dict[str, DebateThread],
+        result: DebateIdentificationResult,
+    ) -> int:
+        """
+        Copy one identification result onto its thread (in place).
+
+        Returns:
+            Change in the number of threads marked as debates
+        """
+        thread = threads_by_id.get(result.thread_id)
+        if thread is None:
+            return 0
 
-    def _analyze_batch(
+        delta = int(result.is_debate) - int(thread.is_debate)
+        thread.is_debate = result.is_debate
+        thread.confidence = result.confidence
+        thread.metadata = result.metadata
+        return delta
+
+    def _build_batch_prompt(
         self,
         username: str,
         threads: List[DebateThread],
-    ) -> List[DebateIdentificationResult]:
-        """Analyze a batch of threads with Claude"""
-
-        # Format threads for prompt
+    ) -> str:
+        """Render the identification prompt for a batch of threads"""
         threads_text = "\n".join(
             self._format_thread_for_prompt(t) for t in threads
         )
 
-        prompt = DEBATE_IDENTIFICATION_PROMPT.format(
+        return DEBATE_IDENTIFICATION_PROMPT.format(
             username=username,
             threads_text=threads_text,
             thread_count=len(threads),
         )
 
-        # Call Claude
-        response = self.client.analyze(
-            system_prompt=SYSTEM_PROMPT,
-            user_prompt=prompt,
-        )
+    async def _aanalyze_batch(
+        self,
+        username: str,
+        threads: List[DebateThread],
+        threads_by_id: Dict[str, DebateThread],
+        sem: asyncio.Semaphore,
+    ) -> int:
+        """
+        Analyze a batch of threads with Claude, limited by the shared
+        semaphore, applying each result as soon as it streams in.
 
-        # Parse results
-        results = []
-        for debate_data in response.get("debates", []):
-            thread_id = debate_data.get("thread_id", "")
-            is_debate = debate_data.get("is_debate", False)
-            confidence = debate_data.get("confidence", 0.5)
-
-            metadata = None
-            if is_debate and "metadata" in debate_data:
-                m = debate_data["metadata"]
-                metadata = DebateMetadata(
-                    topic=m.get("topic", ""),
-                    topic_category=m.get("topic_category", "other"),
-                    user_position=m.get("user_position"),
-                    opponent_position=m.get("opponent_position"),
-                    exchange_depth=m.get("exchange_depth", 0),
-                    is_ongoing=m.get("is_ongoing", False),
-                    apparent_outcome=m.get("apparent_outcome", "unresolved"),
-                )
-
-            results.append(DebateIdentificationResult(
-                thread_id=thread_id,
-                is_debate=is_debate,
-                confidence=confidence,
-                metadata=metadata,
-                reason=debate_data.get("reason"),
-            ))
-
-        return results
+        Returns:
+            Change in the number of threads marked as debates
+        """
+        prompt = self._build_batch_prompt(username, threads)
+        delta = 0
+
+        async with sem:
+            async for debate_data in self.client.aanalyze_stream_items(
+                system_prompt=SYSTEM_PROMPT,
+                user_prompt=prompt,
+                key="debates",
+                max_tokens=self._batch_max_tokens(threads),
+            ):
+                if isinstance(debate_data, dict):
+                    delta += self._apply_result(threads_by_id, self._parse_debate_item(debate_data))
+
+        return delta
+
+    def _parse_debate_item(self, debate_data: Dict) -> DebateIdentificationResult:
+        """Parse one entry of the response's debates array"""
+        thread_id = debate_data.get("thread_id", "")
+        is_debate = debate_data.get("is_debate", False)
+        confidence = debate_data.get("confidence", 0.5)
+
+        metadata = None
+        if is_debate and "metadata" in debate_data:
+            m = debate_data["metadata"]
+            metadata = DebateMetadata(**{
+                **_METADATA_DEFAULTS,
+                **{k: v for k, v in m.items() if k in _METADATA_DEFAULTS},
+            })
+
+        return DebateIdentificationResult(
+            thread_id=thread_id,
+            is_debate=is_debate,
+            confidence=confidence,
+            metadata=metadata,
+            reason=debate_data.get("reason"),
+        )
 
     def quick_filter(
         self,
@@ -266,28 +472,22 @@ class DebateIdentifier:
         """
         filtered = []
         for thread in threads:
+            comment_count = len(thread.user_comments)
+
             # Skip if too few comments
-            if thread.user_comment_count < min_comments:
+            if comment_count < min_comments:
                 thread.is_debate = False
                 thread.confidence = 0.9
-                continue
-
             # Skip if too few words
-            if thread.total_words < min_words:
+            elif thread.user_word_count < min_words:
                 thread.is_debate = False
                 thread.confidence = 0.85
-                continue
-
-            # Skip if no back-and-forth (all top-level)
-            if thread.user_comment_count > 1:
-                depths = [c.depth for c in thread.user_comments]
-                if max(depths) == 0:
-                    # All top-level comments, likely not a debate
-                    thread.is_debate = False
-                    thread.confidence = 0.7
-                    continue
-
-            filtered.append(thread)
+            # Skip if no back-and-forth (all top-level), likely not a debate
+            elif comment_count > 1 and thread.max_user_depth == 0:
+                thread.is_debate = False
+                thread.confidence = 0.7
+            else:
+                filtered.append(thread)
 
         logger.info(f"Quick filter: {len(filtered)}/{len(threads)} threads passed")
         return filtered
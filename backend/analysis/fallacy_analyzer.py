@@ -8,12 +8,15 @@ Identifies logical fallacies in user arguments with:
 - Trend identification
 """
 
+import asyncio
+import bisect
 import logging
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
-from collections import defaultdict
+from functools import cached_property
+from collections import Counter, defaultdict
 
-from analysis.claude_client import ClaudeClient
+from analysis.claude_client import ClaudeClient, CHARS_PER_TOKEN
 from models.user_profile import (
     DebateThread,
     FallacyInstance,
@@ -23,7 +26,48 @@ from models.user_profile import (
 
 logger = logging.getLogger(__name__)
 
-
+# Prompt token budgets for each side's comments. Comments get an equal share
+# of the budget but are never cut shorter than MIN_COMMENT_CHARS; when they
+# do not all fit, top-level and higher-scored comments are kept first.
+USER_COMMENTS_TOKEN_BUDGET = 1500
+OPPONENT_COMMENTS_TOKEN_BUDGET = 1000
+MIN_COMMENT_CHARS = 600
+
+# Numeric scores for averaging per-debate density and per-type severity
+_DENSITY_VALUE = {
+    "none": 0,
+    "low": 1,
+    "moderate": 2,
+    "high": 3,
+    "very_high": 4,
+}
+_SEVERITY_SCORE = {
+    "minor": 1,
+    "moderate": 2,
+    "significant": 3,
+    "severe": 4,
+}
+
+# Average density score cut-offs; a score below DENSITY_THRESHOLDS[i]
+# maps to DENSITY_LABELS[i], anything at or above the last to "very_high"
+DENSITY_THRESHOLDS = (0.5, 1.5, 2.5, 3.5)
+DENSITY_LABELS = ("none", "low", "moderate", "high", "very_high")
+
+# Fallacy detection is classification: sampling variance only adds noise,
+# and greedy decoding keeps repeat analyses consistent for the response cache
+FALLACY_TEMPERATURE = 0.0
+
+# Debates analyzed at once by aanalyze_debates_batch
+MAX_CONCURRENT_ANALYSES = 8
+
+# Enum members by value; unknown strings from Claude fall back to
+# OTHER / MINOR without a ValueError round trip
+_FALLACY_TYPE_MAP = {t.value: t for t in FallacyType}
+_SEVERITY_MAP = {s.value: s for s in FallacySeverity}
+
+
+# Everything that does not vary between debates lives in the system prompt
+# so it is served from Anthropic's prompt cache after the first call
 SYSTEM_PROMPT = """You are an expert in logic, critical thinking, and informal fallacies.
 
 You identify logical fallacies in online debates with precision, distinguishing between:
@@ -35,27 +79,11 @@ You understand that colloquial speech often uses rhetorical shortcuts that aren'
 technically fallacious in context. You focus on substantive logical errors that
 actually weaken arguments.
 
-Always respond with valid JSON matching the requested schema."""
-
-
-FALLACY_DETECTION_PROMPT = """Analyze this debate for logical fallacies committed by the user.
-
-## Debate Context
-- Thread: {thread_title}
-- Subreddit: r/{subreddit}
-- Topic: {topic}
-- User position: {user_position}
-- Opponent position: {opponent_position}
-
-## User's Arguments
-{user_comments}
-
-## Opponent's Arguments (for context)
-{opponent_comments}
+Always report results through the provided tool.
 
-## Fallacy Analysis Required
+## Fallacy Analysis
 
-Identify ALL logical fallacies in the USER's arguments. For each fallacy found:
+Identify ALL logical fallacies in the USER's arguments (not the opponent's). For each fallacy found:
 
 1. **Type**: Classify the fallacy type
 2. **Confidence**: How certain are you this is a fallacy? (0.0-1.0)
@@ -102,36 +130,10 @@ Identify ALL logical fallacies in the USER's arguments. For each fallacy found:
 - motte_and_bailey: Switching between defensible and indefensible claims
 - kafka_trap: Denial of accusation used as proof of it
 
-## Required JSON Output
-
-{{
-    "thread_id": "{thread_id}",
-    "fallacies_detected": [
-        {{
-            "type": "strawman",
-            "confidence": 0.85,
-            "severity": "moderate",
-            "user_statement": "So you're saying we should just let everyone starve?",
-            "opponent_context": "I suggested reducing food stamp eligibility slightly",
-            "explanation": "Exaggerates opponent's position to an extreme they didn't advocate",
-            "comment_id": "abc123",
-            "is_pattern": false
-        }},
-        {{
-            "type": "ad_hominem",
-            "confidence": 0.72,
-            "severity": "minor",
-            "user_statement": "Of course you'd say that, you post in r/conservative",
-            "opponent_context": "Made an argument about fiscal policy",
-            "explanation": "Dismisses argument based on opponent's subreddit history",
-            "comment_id": "def456",
-            "is_pattern": false
-        }}
-    ],
-    "overall_fallacy_density": "low",
-    "most_common_type": "strawman",
-    "notes": "User generally argues in good faith with occasional rhetorical overreach"
-}}
+## Output
+
+Report the findings with the report_fallacies tool. Use "other" for a
+fallacy outside this taxonomy.
 
 Severity levels:
 - minor: Slight logical weakness, doesn't fundamentally undermine argument
@@ -150,14 +152,116 @@ Be precise. Only flag clear fallacies, not mere rhetorical flourishes or valid a
 you personally disagree with."""
 
 
+_NULLABLE_STRING = {"type": ["string", "null"]}
+
+FALLACY_TOOL = {
+    "name": "report_fallacies",
+    "description": "Report the logical fallacies the user committed in one debate.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "fallacies_detected": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "enum": list(_FALLACY_TYPE_MAP)},
+                        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                        "severity": {"type": "string", "enum": list(_SEVERITY_MAP)},
+                        "user_statement": {"type": "string"},
+                        "opponent_context": _NULLABLE_STRING,
+                        "explanation": {"type": "string"},
+                        "comment_id": _NULLABLE_STRING,
+                        "is_pattern": {"type": "boolean"},
+                    },
+                    "required": ["type", "confidence", "severity", "user_statement", "explanation"],
+                },
+            },
+            "overall_fallacy_density": {"type": "string", "enum": list(DENSITY_LABELS)},
+            "most_common_type": _NULLABLE_STRING,
+            "notes": {"type": "string"},
+        },
+        "required": ["fallacies_detected", "overall_fallacy_density"],
+    },
+}
+
+
+def _build_fallacy_prompt(
+    thread_title: str,
+    subreddit: str,
+    topic: str,
+    user_position: str,
+    opponent_position: str,
+    user_comments: str,
+    opponent_comments: str,
+    thread_id: str,
+) -> str:
+    """Render the fallacy detection prompt (f-string compiled once, no per-call format parsing)"""
+    return f"""Analyze this debate for logical fallacies committed by the user.
+
+## Debate Context
+- Thread: {thread_title}
+- Subreddit: r/{subreddit}
+- Topic: {topic}
+- User position: {user_position}
+- Opponent position: {opponent_position}
+
+## User's Arguments
+{user_comments}
+
+## Opponent's Arguments (for context)
+{opponent_comments}
+
+Identify the user's fallacies for thread {thread_id}."""
+
+
+def _fallacy_instance(f: Dict, thread_id: str, index: int) -> FallacyInstance:
+    """Build a FallacyInstance from one entry of Claude's fallacies_detected"""
+    return FallacyInstance(
+        id=f"{thread_id}_{index}",
+        fallacy_type=_FALLACY_TYPE_MAP.get(f.get("type"), FallacyType.OTHER),
+        confidence=f.get("confidence", 0.5),
+        severity=_SEVERITY_MAP.get(f.get("severity"), FallacySeverity.MINOR),
+        user_statement=f.get("user_statement", ""),
+        opponent_actual_statement=f.get("opponent_context"),
+        explanation=f.get("explanation", ""),
+        debate_id=thread_id,
+        comment_id=f.get("comment_id") or "",
+        is_pattern=f.get("is_pattern", False),
+    )
+
+
 @dataclass
 class FallacyAnalysisResult:
-    """Result of fallacy analysis for a single debate"""
+    """
+    Result of fallacy analysis for a single debate.
+
+    FallacyInstance objects are built from Claude's raw entries on first
+    access to `fallacies`; summary-only callers never pay for them.
+    """
     thread_id: str
-    fallacies: List[FallacyInstance]
     fallacy_density: str
     most_common_type: Optional[str] = None
     notes: Optional[str] = None
+    raw_fallacies: List[Dict] = field(default_factory=list, repr=False)
+
+    @cached_property
+    def fallacies(self) -> List[FallacyInstance]:
+        return [
+            _fallacy_instance(f, self.thread_id, i)
+            for i, f in enumerate(self.raw_fallacies)
+        ]
+
+
+@dataclass(slots=True)
+class RankedInstance:
+    """Example instance listed under a ranked fallacy type"""
+    debate_id: str
+    comment_id: str
+    statement: str
+    explanation: str
+    severity: str
+    confidence: float
 
 
 @dataclass
@@ -166,7 +270,7 @@ class FallacyProfile:
     total_fallacies: int = 0
     fallacy_counts: Dict[str, int] = field(default_factory=dict)
     fallacy_by_severity: Dict[str, int] = field(default_factory=dict)
-    ranked_fallacies: List[Dict] = field(default_factory=list)
+    ranked_fallacies: List[Dict] = field(default_factory=list)  # "instances" hold RankedInstance
     instances: List[FallacyInstance] = field(default_factory=list)
     avg_density: str = "low"
     trend: str = "stable"
@@ -180,27 +284,60 @@ class FallacyAnalyzer:
     Detects, classifies, and ranks fallacies with linked instances.
     """
 
-    def __init__(self, claude_client: ClaudeClient):
+    def __init__(self, claude_client: ClaudeClient, use_batch_api: bool = False):
         self.client = claude_client
+        # Submit multi-debate runs as one Message Batches job (half price,
+        # but results can take minutes) instead of one call per debate
+        self.use_batch_api = use_batch_api
 
     def _format_comments(
         self,
         comments: List[Any],
-        max_comments: int = 10,
-        max_chars: int = 600,
+        token_budget: int = USER_COMMENTS_TOKEN_BUDGET,
     ) -> str:
-        """Format comments for prompt"""
-        lines = []
-        for i, comment in enumerate(comments[:max_comments]):
-            body = comment.body[:max_chars]
-            if len(comment.body) > max_chars:
-                body += "..."
+        """
+        Format comments for prompt, packed into a token budget.
 
-            lines.append(f"[{comment.id}] (depth: {comment.depth})")
-            lines.append(f"{body}")
-            lines.append("")
+        Args:
+            comments: Comments in thread order
+            token_budget: Approximate prompt tokens the comments may use
 
-        return "\n".join(lines)
+        Returns:
+            Comments in their original order, with a marker for any left out
+        """
+        if not comments:
+            return ""
+
+        budget_chars = token_budget * CHARS_PER_TOKEN
+        max_chars = max(MIN_COMMENT_CHARS, budget_chars // len(comments))
+
+        # One string per comment, joined once; the ellipsis is built into
+        # the same f-string instead of a second concatenation
+        entries = [
+            f"[{comment.id}] (depth: {comment.depth})\n{comment.body[:max_chars]}"
+            f"{'...' if len(comment.body) > max_chars else ''}\n"
+            for comment in comments
+        ]
+
+        if sum(len(entry) + 1 for entry in entries) > budget_chars:
+            by_priority = sorted(
+                range(len(comments)),
+                key=lambda i: (comments[i].depth, -comments[i].score),
+            )
+            kept = []
+            used = 0
+            for i in by_priority:
+                size = len(entries[i]) + 1
+                if used + size > budget_chars and kept:
+                    continue
+                kept.append(i)
+                used += size
+
+            omitted = len(entries) - len(kept)
+            entries = [entries[i] for i in sorted(kept)]
+            entries.append(f"[... {omitted} more comments omitted ...]\n")
+
+        return "\n".join(entries)
 
     def analyze_debate(
         self,
@@ -217,6 +354,35 @@ class FallacyAnalyzer:
         """
         logger.debug(f"Analyzing fallacies in thread {thread.thread_id}")
 
+        # Call Claude
+        response = self.client.analyze(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=self._build_prompt(thread),
+            temperature=FALLACY_TEMPERATURE,
+            tool=FALLACY_TOOL,
+        )
+
+        # Parse response
+        return self._parse_fallacy_response(response, thread.thread_id)
+
+    async def aanalyze_debate(
+        self,
+        thread: DebateThread,
+    ) -> FallacyAnalysisResult:
+        """Async variant of analyze_debate()"""
+        logger.debug(f"Analyzing fallacies in thread {thread.thread_id}")
+
+        response = await self.client.aanalyze(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=self._build_prompt(thread),
+            temperature=FALLACY_TEMPERATURE,
+            tool=FALLACY_TOOL,
+        )
+
+        return self._parse_fallacy_response(response, thread.thread_id)
+
+    def _build_prompt(self, thread: DebateThread) -> str:
+        """Fallacy detection prompt for one debate thread"""
         # Extract metadata
         topic = thread.metadata.topic if thread.metadata else "Unknown"
         user_position = thread.metadata.user_position if thread.metadata else "Unknown"
@@ -225,12 +391,12 @@ class FallacyAnalyzer:
         # Format comments
         user_comments = self._format_comments(thread.user_comments)
         opponent_comments = (
-            self._format_comments(thread.opponent_comments)
+            self._format_comments(thread.opponent_comments, OPPONENT_COMMENTS_TOKEN_BUDGET)
             if thread.opponent_comments
             else "No opponent comments available"
         )
 
-        prompt = FALLACY_DETECTION_PROMPT.format(
+        return _build_fallacy_prompt(
             thread_title=thread.thread_title[:100],
             subreddit=thread.subreddit,
             topic=topic,
@@ -241,54 +407,34 @@ class FallacyAnalyzer:
             thread_id=thread.thread_id,
         )
 
-        # Call Claude
-        response = self.client.analyze(
-            system_prompt=SYSTEM_PROMPT,
-            user_prompt=prompt,
-        )
-
-        # Parse response
-        return self._parse_fallacy_response(response, thread.thread_id)
-
     def _parse_fallacy_response(
         self,
         response: Dict,
         thread_id: str,
     ) -> FallacyAnalysisResult:
         """Parse Claude's fallacy detection response"""
-
-        fallacies = []
-        for f in response.get("fallacies_detected", []):
-            try:
-                fallacy_type = FallacyType(f.get("type", "other"))
-            except ValueError:
-                fallacy_type = FallacyType.OTHER
-
-            try:
-                severity = FallacySeverity(f.get("severity", "minor"))
-            except ValueError:
-                severity = FallacySeverity.MINOR
-
-            fallacies.append(FallacyInstance(
-                fallacy_type=fallacy_type,
-                confidence=f.get("confidence", 0.5),
-                severity=severity,
-                user_statement=f.get("user_statement", ""),
-                opponent_context=f.get("opponent_context"),
-                explanation=f.get("explanation", ""),
-                debate_id=thread_id,
-                comment_id=f.get("comment_id"),
-                is_pattern=f.get("is_pattern", False),
-            ))
-
         return FallacyAnalysisResult(
             thread_id=thread_id,
-            fallacies=fallacies,
+            raw_fallacies=response.get("fallacies_detected", []),
             fallacy_density=response.get("overall_fallacy_density", "low"),
             most_common_type=response.get("most_common_type"),
             notes=response.get("notes"),
         )
 
+    @staticmethod
+    def filter_debates(threads: List[DebateThread]) -> List[DebateThread]:
+        """
+        Threads identified as debates, the only ones worth a fallacy prompt.
+
+        A thread listed more than once is kept once: its prompt, and so its
+        analysis, would be identical, and results are keyed by thread_id.
+        """
+        unique = {}
+        for thread in threads:
+            if thread.is_debate:
+                unique.setdefault(thread.thread_id, thread)
+        return list(unique.values())
+
     def analyze_debates_batch(
         self,
         threads: List[DebateThread],
@@ -296,16 +442,33 @@ class FallacyAnalyzer:
         """
         Analyze multiple debates for fallacies.
 
+        Debates are analyzed concurrently via aanalyze_debates_batch().
+        Inside a running event loop, await aanalyze_debates_batch()
+        directly instead; this method then falls back to analyzing
+        debates one at a time.
+
+        With use_batch_api the debates go out as one Message Batches job;
+        any the batch could not answer are then analyzed individually.
+
         Args:
             threads: List of debate threads to analyze
 
         Returns:
             Dict mapping thread_id to FallacyAnalysisResult
         """
+        debates = self.filter_debates(threads)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._analyze_and_close(debates))
+
         results = {}
+        if self.use_batch_api and len(debates) > 1:
+            results = self._analyze_with_batch_api(debates)
 
-        for thread in threads:
-            if not thread.is_debate:
+        for thread in debates:
+            if thread.thread_id in results:
                 continue
 
             try:
@@ -318,6 +481,84 @@ class FallacyAnalyzer:
         logger.info(f"Analyzed fallacies in {len(results)} debates")
         return results
 
+    async def _analyze_and_close(
+        self,
+        debates: List[DebateThread],
+    ) -> Dict[str, FallacyAnalysisResult]:
+        """Run _aanalyze_debates on a throwaway loop, then release its connections"""
+        try:
+            return await self._aanalyze_debates(debates, MAX_CONCURRENT_ANALYSES)
+        finally:
+            await self.client.aclose()
+
+    async def aanalyze_debates_batch(
+        self,
+        threads: List[DebateThread],
+        max_concurrency: int = MAX_CONCURRENT_ANALYSES,
+    ) -> Dict[str, FallacyAnalysisResult]:
+        """
+        Async variant of analyze_debates_batch() that analyzes debates concurrently.
+
+        Args:
+            threads: List of debate threads to analyze
+            max_concurrency: Maximum Claude calls in flight at once
+
+        Returns:
+            Dict mapping thread_id to FallacyAnalysisResult
+        """
+        return await self._aanalyze_debates(self.filter_debates(threads), max_concurrency)
+
+    async def _aanalyze_debates(
+        self,
+        debates: List[DebateThread],
+        max_concurrency: int,
+    ) -> Dict[str, FallacyAnalysisResult]:
+        """Concurrently analyze threads already narrowed down by filter_debates()"""
+        results = {}
+        if self.use_batch_api and len(debates) > 1:
+            # Submitting and polling the batch blocks; keep it off the event loop
+            results = await asyncio.to_thread(self._analyze_with_batch_api, debates)
+
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def analyze(thread: DebateThread) -> FallacyAnalysisResult:
+            async with sem:
+                return await self.aanalyze_debate(thread)
+
+        pending = [thread for thread in debates if thread.thread_id not in results]
+        outcomes = await asyncio.gather(
+            *[analyze(thread) for thread in pending], return_exceptions=True
+        )
+
+        for thread, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error analyzing thread {thread.thread_id}: {outcome}")
+                continue
+            results[thread.thread_id] = outcome
+
+        logger.info(f"Analyzed fallacies in {len(results)} debates")
+        return results
+
+    def _analyze_with_batch_api(
+        self,
+        debates: List[DebateThread],
+    ) -> Dict[str, FallacyAnalysisResult]:
+        """Analyze debates in one Message Batches job; returns {} if the batch fails"""
+        prompts = {thread.thread_id: self._build_prompt(thread) for thread in debates}
+
+        try:
+            responses = self.client.analyze_batch(
+                SYSTEM_PROMPT, prompts, temperature=FALLACY_TEMPERATURE, tool=FALLACY_TOOL
+            )
+        except Exception as e:
+            logger.warning(f"Message batch failed ({e}), analyzing debates one at a time")
+            return {}
+
+        return {
+            thread_id: self._parse_fallacy_response(response, thread_id)
+            for thread_id, response in responses.items()
+        }
+
     def build_fallacy_profile(
         self,
         analysis_results: Dict[str, FallacyAnalysisResult],
@@ -335,25 +576,23 @@ class FallacyAnalyzer:
 
         # Collect all fallacies
         all_fallacies: List[FallacyInstance] = []
-        type_counts: Dict[str, int] = defaultdict(int)
+        type_counts: Counter = Counter()
         severity_counts: Dict[str, int] = defaultdict(int)
-        density_values = []
-
-        density_map = {
-            "none": 0,
-            "low": 1,
-            "moderate": 2,
-            "high": 3,
-            "very_high": 4,
-        }
+        instances_by_type: Dict[str, List[FallacyInstance]] = defaultdict(list)
+        severity_sum_by_type: Dict[str, int] = defaultdict(int)
+        density_sum = 0
 
         for result in analysis_results.values():
             all_fallacies.extend(result.fallacies)
-            density_values.append(density_map.get(result.fallacy_density, 1))
+            density_sum += _DENSITY_VALUE.get(result.fallacy_density, 1)
 
             for fallacy in result.fallacies:
-                type_counts[fallacy.fallacy_type.value] += 1
-                severity_counts[fallacy.severity.value] += 1
+                fallacy_type = fallacy.fallacy_type_value
+                severity = fallacy.severity_value
+                type_counts[fallacy_type] += 1
+                severity_counts[severity] += 1
+                instances_by_type[fallacy_type].append(fallacy)
+                severity_sum_by_type[fallacy_type] += _SEVERITY_SCORE[severity]
 
         profile.total_fallacies = len(all_fallacies)
         profile.fallacy_counts = dict(type_counts)
@@ -361,42 +600,15 @@ class FallacyAnalyzer:
         profile.instances = all_fallacies
 
         # Calculate average density
-        if density_values:
-            avg_density = sum(density_values) / len(density_values)
-            if avg_density < 0.5:
-                profile.avg_density = "none"
-            elif avg_density < 1.5:
-                profile.avg_density = "low"
-            elif avg_density < 2.5:
-                profile.avg_density = "moderate"
-            elif avg_density < 3.5:
-                profile.avg_density = "high"
-            else:
-                profile.avg_density = "very_high"
+        if analysis_results:
+            avg_density = density_sum / len(analysis_results)
+            profile.avg_density = DENSITY_LABELS[bisect.bisect_right(DENSITY_THRESHOLDS, avg_density)]
 
         # Build ranked fallacy list
         ranked = []
-        for fallacy_type, count in sorted(
-            type_counts.items(),
-            key=lambda x: x[1],
-            reverse=True,
-        ):
-            # Get instances of this type
-            instances = [
-                f for f in all_fallacies
-                if f.fallacy_type.value == fallacy_type
-            ]
-
-            # Calculate average severity
-            severity_scores = {
-                "minor": 1,
-                "moderate": 2,
-                "significant": 3,
-                "severe": 4,
-            }
-            avg_severity = sum(
-                severity_scores.get(f.severity.value, 1) for f in instances
-            ) / len(instances) if instances else 1
+        for fallacy_type, count in type_counts.most_common():
+            instances = instances_by_type[fallacy_type]
+            avg_severity = severity_sum_by_type[fallacy_type] / count
 
             ranked.append({
                 "fallacy_type": fallacy_type,
@@ -404,14 +616,14 @@ class FallacyAnalyzer:
                 "percentage": round(count / profile.total_fallacies * 100, 1) if profile.total_fallacies else 0,
                 "avg_severity": round(avg_severity, 2),
                 "instances": [
-                    {
-                        "debate_id": f.debate_id,
-                        "comment_id": f.comment_id,
-                        "statement": f.user_statement[:200],
-                        "explanation": f.explanation,
-                        "severity": f.severity.value,
-                        "confidence": f.confidence,
-                    }
+                    RankedInstance(
+                        debate_id=f.debate_id,
+                        comment_id=f.comment_id,
+                        statement=f.user_statement[:200],
+                        explanation=f.explanation,
+                        severity=f.severity_value,
+                        confidence=f.confidence,
+                    )
                     for f in instances[:5]  # Top 5 instances
                 ],
             })
@@ -11,15 +11,22 @@ Combines all analysis results into a comprehensive user profile:
 - Good faith assessment
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime
+from functools import cached_property
 
 from models.user_profile import (
     UserProfile,
     DebateThread,
+    DebateMetadata,
     ArgumentQuality,
+    ArgumentCategory,
+    ArchetypeType,
+    DebateAggregate,
+    QualityAggregate,
     GoodFaithAssessment,
 )
 from analysis.fallacy_analyzer import FallacyProfile, FallacyAnalyzer
@@ -27,23 +34,27 @@ from analysis.archetype_analyzer import ArchetypeResult, MBTIResult, ArchetypeAn
 from analysis.top_arguments import TopArgumentsResult, TopArgumentsAnalyzer
 from analysis.topic_expertise import TopicExpertiseResult, TopicExpertiseAnalyzer
 from analysis.claude_client import ClaudeClient
+from cache.cache_manager import CacheManager
 
 logger = logging.getLogger(__name__)
 
+# Analysis cache slot holding the last synthesized profile per user
+PROFILE_CACHE_TYPE = "profile"
 
-GOOD_FAITH_PROMPT = """Assess whether this debater argues in good faith based on their debate history.
+# Part of the cached profile's key; bump whenever an analyzer's prompt or
+# tool schema changes so profiles built from the old prompts are rebuilt
+PROFILE_PROMPT_VERSION = "1"
 
-## User: u/{username}
+# Second-wave analyses, in the order synthesize runs them
+SECOND_WAVE_ANALYSES = ("archetype", "mbti", "top_arguments", "topic_expertise", "good_faith")
 
-## Debate Statistics
-- Total debates analyzed: {total_debates}
-- Average civility score: {avg_civility}
-- Changed opponent's mind: {mind_changes} times
-- Conceded to opponent: {concessions} times
-- Fallacy density: {fallacy_density}
+# Enum members to their serialized strings, resolved once
+_CATEGORY_VALUE = {c: c.value for c in ArgumentCategory}
+_ARCHETYPE_VALUE = {a: a.value for a in ArchetypeType}
 
-## Behavioral Patterns
-{behavioral_patterns}
+
+# Static criteria and schema; identical on every call so Anthropic caches it
+GOOD_FAITH_SYSTEM_PROMPT = """You assess good faith in online debates based on behavioral patterns.
 
 ## Good Faith Indicators
 
@@ -63,8 +74,8 @@ GOOD_FAITH_PROMPT = """Assess whether this debater argues in good faith based on
 
 ## Required JSON Output
 
-{{
-    "username": "{username}",
+{
+    "username": "the debater's username",
     "good_faith_score": 78,
     "assessment": "generally_good_faith",
     "positive_indicators": [
@@ -76,34 +87,60 @@ GOOD_FAITH_PROMPT = """Assess whether this debater argues in good faith based on
         "Sometimes misrepresents opponent positions",
         "Rarely updates stated positions"
     ],
-    "intellectual_honesty": {{
+    "intellectual_honesty": {
         "score": 75,
         "evidence": [
             "Cites sources regularly",
             "Acknowledges limitations of own arguments"
         ]
-    }},
-    "openness_to_change": {{
+    },
+    "openness_to_change": {
         "score": 65,
         "evidence": [
             "Has changed mind in 2 debates",
             "Generally resistant to updating views"
         ]
-    }},
-    "respect_for_opponents": {{
+    },
+    "respect_for_opponents": {
         "score": 82,
         "evidence": [
             "Maintains professional tone",
             "Addresses arguments rather than persons"
         ]
-    }},
+    },
     "summary": "This debater generally argues in good faith with occasional rhetorical overreach. Shows respect for opponents and uses evidence appropriately, though could be more open to updating positions."
-}}
+}
+
+Assessment levels: exemplary, generally_good_faith, mixed, questionable, bad_faith
+Always respond with valid JSON matching this schema."""
 
-Assessment levels: exemplary, generally_good_faith, mixed, questionable, bad_faith"""
 
+def _build_good_faith_prompt(
+    username: str,
+    total_debates: int,
+    avg_civility: str,
+    mind_changes: int,
+    concessions: int,
+    fallacy_density: str,
+    behavioral_patterns: str,
+) -> str:
+    """Render the per-user good faith statistics (f-string compiled once, no per-call format parsing)"""
+    return f"""Assess whether this debater argues in good faith based on their debate history.
 
-@dataclass
+## User: u/{username}
+
+## Debate Statistics
+- Total debates analyzed: {total_debates}
+- Average civility score: {avg_civility}
+- Changed opponent's mind: {mind_changes} times
+- Conceded to opponent: {concessions} times
+- Fallacy density: {fallacy_density}
+
+## Behavioral Patterns
+{behavioral_patterns}"""
+
+
+@dataclass(slots=True)
 class SynthesizedProfile:
     """Complete synthesized user profile"""
     username: str
@@ -144,12 +181,39 @@ class ProfileSynthesizer:
     Synthesizes all analysis results into a comprehensive profile.
     """
 
-    def __init__(self, claude_client: ClaudeClient):
+    def __init__(
+        self,
+        claude_client: ClaudeClient,
+        use_batch_api: bool = False,
+        cache: Optional[CacheManager] = None,
+    ):
+        """
+        Args:
+            claude_client: Client shared by all analyzers
+            use_batch_api: Send fallacy analyses as one Message Batches job
+            cache: Reuse the last profile while a user's debates are unchanged
+        """
         self.client = claude_client
-        self.fallacy_analyzer = FallacyAnalyzer(claude_client)
-        self.archetype_analyzer = ArchetypeAnalyzer(claude_client)
-        self.top_args_analyzer = TopArgumentsAnalyzer(claude_client)
-        self.topic_analyzer = TopicExpertiseAnalyzer(claude_client)
+        self.use_batch_api = use_batch_api
+        self.cache = cache
+
+    # Analyzers are built on first use; users without debates never need them
+
+    @cached_property
+    def fallacy_analyzer(self) -> FallacyAnalyzer:
+        return FallacyAnalyzer(self.client, use_batch_api=self.use_batch_api)
+
+    @cached_property
+    def archetype_analyzer(self) -> ArchetypeAnalyzer:
+        return ArchetypeAnalyzer(self.client)
+
+    @cached_property
+    def top_args_analyzer(self) -> TopArgumentsAnalyzer:
+        return TopArgumentsAnalyzer(self.client)
+
+    @cached_property
+    def topic_analyzer(self) -> TopicExpertiseAnalyzer:
+        return TopicExpertiseAnalyzer(self.client)
 
     def synthesize(
         self,
@@ -157,128 +221,354 @@ class ProfileSynthesizer:
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
         run_all_analyses: bool = True,
+        force_refresh: bool = False,
     ) -> SynthesizedProfile:
         """
         Run all analyses and synthesize into comprehensive profile.
 
+        The Claude analyses run concurrently via asynthesize(). Inside a
+        running event loop, await asynthesize() directly instead; this
+        method then falls back to running the analyses one at a time.
+
         Args:
             username: Reddit username
             debates: List of debate threads
             quality_results: Argument quality results
             run_all_analyses: Whether to run all Claude analyses
+            force_refresh: Rebuild even if a cached profile matches
 
         Returns:
             SynthesizedProfile with all analysis results
         """
+        if not (run_all_analyses and debates):
+            # Nothing for Claude to do; skip the event loop and the analyzers
+            return self._summary_profile(username, debates, quality_results)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._synthesize_and_close(
+                username, debates, quality_results, run_all_analyses, force_refresh
+            ))
+
         logger.info(f"Synthesizing profile for u/{username}")
 
-        # Calculate base statistics
-        scores = list(quality_results.values())
-        overall_score = int(sum(q.overall_score for q in scores) / len(scores)) if scores else 0
-
-        quality_breakdown = self._calculate_quality_breakdown(scores)
-
-        # Initialize results
-        fallacy_profile = {}
-        archetype = {}
-        mbti = {}
-        top_arguments = []
-        signature_techniques = []
-        topic_expertise = []
-        knowledge_profile = {}
-        good_faith = {}
-
-        if run_all_analyses and debates:
-            # Run fallacy analysis
-            logger.info("Running fallacy analysis...")
-            fallacy_results = self.fallacy_analyzer.analyze_debates_batch(debates)
-            fallacy_profile_obj = self.fallacy_analyzer.build_fallacy_profile(fallacy_results)
-            fallacy_profile = self._serialize_fallacy_profile(fallacy_profile_obj)
-
-            # Run archetype classification
-            logger.info("Running archetype classification...")
-            archetype_result = self.archetype_analyzer.classify_archetype(
-                username, debates, quality_results
-            )
-            archetype = self._serialize_archetype(archetype_result)
+        cache_key, cached = self._cached_profile(username, debates, quality_results, force_refresh)
+        if cached is not None:
+            return cached
 
-            # Run MBTI inference
-            logger.info("Running MBTI inference...")
-            mbti_result = self.archetype_analyzer.infer_mbti(
-                username, debates, quality_results
-            )
-            mbti = self._serialize_mbti(mbti_result)
+        aggregate = QualityAggregate.from_qualities(quality_results.values())
+        debate_stats = DebateAggregate.from_debates(debates)
 
-            # Run top arguments extraction
-            logger.info("Extracting top arguments...")
-            top_args_result = self.top_args_analyzer.extract_top_arguments(
-                username, debates, quality_results
-            )
-            top_arguments = self._serialize_top_arguments(top_args_result)
-            signature_techniques = top_args_result.signature_techniques
+        logger.info("Running fallacy analysis...")
+        fallacy_results = self.fallacy_analyzer.analyze_debates_batch(debates)
+        fallacy_profile_obj = self.fallacy_analyzer.build_fallacy_profile(fallacy_results)
 
-            # Run topic expertise analysis
-            logger.info("Analyzing topic expertise...")
-            topic_result = self.topic_analyzer.analyze_expertise(
-                username, debates, quality_results
+        logger.info("Running archetype, MBTI, top argument, expertise and good faith analyses...")
+        calls = self._second_wave_calls(
+            username, debates, quality_results, aggregate, debate_stats, fallacy_profile_obj
+        )
+        outcomes = []
+        for call, *args in calls:
+            try:
+                outcomes.append(call(*args))
+            except Exception as e:
+                outcomes.append(e)
+
+        return self._finish_profile(
+            cache_key, username, debates, quality_results,
+            aggregate, debate_stats, fallacy_profile_obj, outcomes,
+        )
+
+    async def _synthesize_and_close(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        run_all_analyses: bool,
+        force_refresh: bool,
+    ) -> SynthesizedProfile:
+        """Run asynthesize on a throwaway loop, then release its connections"""
+        try:
+            return await self.asynthesize(
+                username, debates, quality_results, run_all_analyses, force_refresh
             )
-            topic_expertise = self._serialize_topic_expertise(topic_result)
-            knowledge_profile = {
-                "breadth": topic_result.knowledge_profile.breadth,
-                "depth": topic_result.knowledge_profile.depth,
-                "primary_domains": topic_result.knowledge_profile.primary_domains,
-                "emerging_interests": topic_result.knowledge_profile.emerging_interests,
-                "cross_domain_connections": topic_result.knowledge_profile.cross_domain_connections,
+        finally:
+            await self.client.aclose()
+
+    async def asynthesize(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        run_all_analyses: bool = True,
+        force_refresh: bool = False,
+    ) -> SynthesizedProfile:
+        """
+        Async variant of synthesize() that runs the Claude analyses concurrently.
+
+        Fallacy analysis goes first because good faith assessment builds on
+        its profile; the remaining five analyses are independent and are
+        then dispatched together.
+
+        Args:
+            username: Reddit username
+            debates: List of debate threads
+            quality_results: Argument quality results
+            run_all_analyses: Whether to run all Claude analyses
+            force_refresh: Rebuild even if a cached profile matches
+
+        Returns:
+            SynthesizedProfile with all analysis results
+        """
+        if not (run_all_analyses and debates):
+            return self._summary_profile(username, debates, quality_results)
+
+        logger.info(f"Synthesizing profile for u/{username}")
+
+        cache_key, cached = self._cached_profile(username, debates, quality_results, force_refresh)
+        if cached is not None:
+            return cached
+
+        aggregate = QualityAggregate.from_qualities(quality_results.values())
+        debate_stats = DebateAggregate.from_debates(debates)
+
+        logger.info("Running fallacy analysis...")
+        fallacy_results = await self.fallacy_analyzer.aanalyze_debates_batch(debates)
+        fallacy_profile_obj = self.fallacy_analyzer.build_fallacy_profile(fallacy_results)
+
+        # Analyzers with a native async variant are awaited directly; the
+        # synchronous ones each get their own worker thread. A failed
+        # analysis is returned rather than raised so the others survive
+        logger.info("Running archetype, MBTI, top argument, expertise and good faith analyses...")
+        calls = self._second_wave_calls(
+            username, debates, quality_results, aggregate, debate_stats, fallacy_profile_obj,
+            native_async=True,
+        )
+        outcomes = await asyncio.gather(
+            *[
+                call(*args) if asyncio.iscoroutinefunction(call) else asyncio.to_thread(call, *args)
+                for call, *args in calls
+            ],
+            return_exceptions=True,
+        )
+
+        return self._finish_profile(
+            cache_key, username, debates, quality_results,
+            aggregate, debate_stats, fallacy_profile_obj, outcomes,
+        )
+
+    def _second_wave_calls(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        aggregate: QualityAggregate,
+        debate_stats: DebateAggregate,
+        fallacy_profile: FallacyProfile,
+        native_async: bool = False,
+    ) -> List[tuple]:
+        """
+        (callable, *args) for each analysis in SECOND_WAVE_ANALYSES order
+
+        With native_async, analyzers that have an async variant contribute
+        their coroutine function instead of the blocking method.
+        """
+        topic_call = (
+            self.topic_analyzer.aanalyze_expertise
+            if native_async
+            else self.topic_analyzer.analyze_expertise
+        )
+        return [
+            (self.archetype_analyzer.classify_archetype, username, debates, quality_results, aggregate),
+            (self.archetype_analyzer.infer_mbti, username, debates, quality_results, aggregate),
+            (self.top_args_analyzer.extract_top_arguments, username, debates, quality_results),
+            (topic_call, username, debates, quality_results),
+            (
+                self._assess_good_faith, username, debates, quality_results,
+                fallacy_profile, aggregate, debate_stats,
+            ),
+        ]
+
+    def _finish_profile(
+        self,
+        cache_key: Optional[str],
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        aggregate: QualityAggregate,
+        debate_stats: DebateAggregate,
+        fallacy_profile: FallacyProfile,
+        outcomes: List[Any],
+    ) -> SynthesizedProfile:
+        """
+        Build the profile from second-wave outcomes.
+
+        Analyses that raised are logged and left empty in the profile, and a
+        profile with any such gaps is not cached so the next run retries them.
+        """
+        results = {}
+        for name, outcome in zip(SECOND_WAVE_ANALYSES, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"{name} analysis failed for u/{username}: {outcome}")
+                continue
+            results[name] = outcome
+
+        analyses = self._serialize_analyses(fallacy_profile, results)
+        profile = self._build_profile(
+            username, debates, quality_results, aggregate, debate_stats, analyses
+        )
+        if len(results) == len(SECOND_WAVE_ANALYSES):
+            self._store_profile(cache_key, profile)
+        return profile
+
+    def _cached_profile(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        force_refresh: bool = False,
+    ) -> Tuple[Optional[str], Optional[SynthesizedProfile]]:
+        """
+        Look up the user's last profile.
+
+        The key covers the Claude model and PROFILE_PROMPT_VERSION as well as
+        the debates, so switching either rebuilds the profile.
+
+        Returns:
+            (debate set hash, cached profile if it was built from the same
+            model, prompts, debates and quality scores); the hash is None
+            without a cache, the profile is None with force_refresh
+        """
+        if self.cache is None:
+            return None, None
+
+        parts = [username.lower(), self.client.model, PROFILE_PROMPT_VERSION]
+        for debate in sorted(debates, key=lambda d: d.thread_id):
+            quality = quality_results.get(debate.thread_id)
+            parts.append(debate.thread_id)
+            parts.append(",".join(c.id for c in debate.user_comments))
+            parts.append(str(len(debate.opponent_comments)))
+            parts.append(str(quality.overall_score) if quality else "")
+        cache_key = self.cache.response_key(*parts)
+        if force_refresh:
+            return cache_key, None
+
+        cached = self.cache.get_analysis_cache(username, PROFILE_CACHE_TYPE)
+        if not cached or cached.get("_debate_set") != cache_key:
+            return cache_key, None
+
+        logger.info(f"Reusing cached profile for u/{username}: debates unchanged")
+        return cache_key, SynthesizedProfile(
+            **{f.name: cached[f.name] for f in fields(SynthesizedProfile)}
+        )
+
+    def _store_profile(self, cache_key: Optional[str], profile: SynthesizedProfile) -> None:
+        """Remember a profile under the debate set hash it was built from"""
+        if cache_key is None:
+            return
+
+        data = self.to_dict(profile)
+        data["_debate_set"] = cache_key
+        self.cache.set_analysis_cache(profile.username, PROFILE_CACHE_TYPE, data)
+
+    def _summary_profile(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+    ) -> SynthesizedProfile:
+        """Profile from quality scores and debate summaries alone, without Claude analyses"""
+        return self._build_profile(
+            username,
+            debates,
+            quality_results,
+            QualityAggregate.from_qualities(quality_results.values()),
+            DebateAggregate.from_debates(debates),
+            {},
+        )
+
+    def _serialize_analyses(
+        self,
+        fallacy_profile: FallacyProfile,
+        results: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Convert the Claude analysis results to SynthesizedProfile fields.
+
+        Args:
+            fallacy_profile: First-wave fallacy profile
+            results: Second-wave results keyed by SECOND_WAVE_ANALYSES name;
+                missing analyses contribute no fields
+        """
+        analyses = {"fallacy_profile": self._serialize_fallacy_profile(fallacy_profile)}
+
+        if "archetype" in results:
+            analyses["archetype"] = self._serialize_archetype(results["archetype"])
+        if "mbti" in results:
+            analyses["mbti"] = self._serialize_mbti(results["mbti"])
+
+        top_args_result = results.get("top_arguments")
+        if top_args_result is not None:
+            analyses["top_arguments"] = self._serialize_top_arguments(top_args_result)
+            analyses["signature_techniques"] = top_args_result.signature_techniques
+
+        topic_result = results.get("topic_expertise")
+        if topic_result is not None:
+            knowledge = topic_result.knowledge_profile
+            analyses["topic_expertise"] = self._serialize_topic_expertise(topic_result)
+            analyses["knowledge_profile"] = {
+                "breadth": knowledge.breadth,
+                "depth": knowledge.depth,
+                "primary_domains": knowledge.primary_domains,
+                "emerging_interests": knowledge.emerging_interests,
+                "cross_domain_connections": knowledge.cross_domain_connections,
             }
 
-            # Run good faith assessment
-            logger.info("Assessing good faith...")
-            good_faith = self._assess_good_faith(
-                username, debates, quality_results, fallacy_profile_obj
-            )
+        if "good_faith" in results:
+            analyses["good_faith"] = results["good_faith"]
 
-        # Build debate summaries
-        debate_summaries = self._build_debate_summaries(debates, quality_results)
+        return analyses
 
+    def _build_profile(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+        aggregate: QualityAggregate,
+        debate_stats: DebateAggregate,
+        analyses: Dict[str, Any],
+    ) -> SynthesizedProfile:
+        """Assemble the profile; analyses that did not run are left empty"""
         return SynthesizedProfile(
             username=username,
             analyzed_at=datetime.now().isoformat(),
-            overall_score=overall_score,
-            debates_analyzed=len(debates),
-            total_comments=sum(d.user_comment_count for d in debates),
-            quality_breakdown=quality_breakdown,
-            archetype=archetype,
-            mbti=mbti,
-            good_faith=good_faith,
-            fallacy_profile=fallacy_profile,
-            top_arguments=top_arguments,
-            signature_techniques=signature_techniques,
-            topic_expertise=topic_expertise,
-            knowledge_profile=knowledge_profile,
-            debates=debate_summaries,
+            overall_score=int(aggregate.avg_overall()),
+            debates_analyzed=debate_stats.n,
+            total_comments=debate_stats.total_user_comments,
+            quality_breakdown=self._calculate_quality_breakdown(aggregate),
+            archetype=analyses.get("archetype", {}),
+            mbti=analyses.get("mbti", {}),
+            good_faith=analyses.get("good_faith", {}),
+            fallacy_profile=analyses.get("fallacy_profile", {}),
+            top_arguments=analyses.get("top_arguments", []),
+            signature_techniques=analyses.get("signature_techniques", []),
+            topic_expertise=analyses.get("topic_expertise", []),
+            knowledge_profile=analyses.get("knowledge_profile", {}),
+            debates=self._build_debate_summaries(debates, quality_results),
         )
 
     def _calculate_quality_breakdown(
         self,
-        scores: List[ArgumentQuality],
+        aggregate: QualityAggregate,
     ) -> Dict[str, float]:
-        """Calculate average quality across dimensions"""
-        if not scores:
-            return {
-                "structure": 0,
-                "evidence": 0,
-                "counterargument": 0,
-                "persuasiveness": 0,
-                "civility": 0,
-            }
-
-        n = len(scores)
+        """Average quality across dimensions, from the one-pass aggregate"""
         return {
-            "structure": round(sum(q.structure_score for q in scores) / n, 1),
-            "evidence": round(sum(q.evidence_score for q in scores) / n, 1),
-            "counterargument": round(sum(q.counterargument_score for q in scores) / n, 1),
-            "persuasiveness": round(sum(q.persuasiveness_score for q in scores) / n, 1),
-            "civility": round(sum(q.civility_score for q in scores) / n, 1),
+            "structure": round(aggregate.avg_structure(), 1),
+            "evidence": round(aggregate.avg_evidence(), 1),
+            "counterargument": round(aggregate.avg_counter(), 1),
+            "persuasiveness": round(aggregate.avg_persuade(), 1),
+            "civility": round(aggregate.avg_civility(), 1),
         }
 
     def _serialize_fallacy_profile(self, profile: FallacyProfile) -> Dict[str, Any]:
@@ -287,7 +577,10 @@ class ProfileSynthesizer:
             "total_fallacies": profile.total_fallacies,
             "fallacy_counts": profile.fallacy_counts,
             "fallacy_by_severity": profile.fallacy_by_severity,
-            "ranked_fallacies": profile.ranked_fallacies,
+            "ranked_fallacies": [
+                {**entry, "instances": [asdict(inst) for inst in entry["instances"]]}
+                for entry in profile.ranked_fallacies
+            ],
             "avg_density": profile.avg_density,
             "trend": profile.trend,
             "notes": profile.notes,
@@ -297,13 +590,13 @@ class ProfileSynthesizer:
         """Convert ArchetypeResult to serializable dict"""
         return {
             "primary": {
-                "type": result.primary.archetype_type.value,
+                "type": _ARCHETYPE_VALUE[result.primary.type],
                 "confidence": result.primary.confidence,
                 "evidence": result.primary.evidence,
             },
             "secondary": [
                 {
-                    "type": sec.archetype_type.value,
+                    "type": _ARCHETYPE_VALUE[sec.type],
                     "confidence": sec.confidence,
                     "evidence": sec.evidence,
                 }
@@ -332,7 +625,7 @@ class ProfileSynthesizer:
             {
                 "rank": arg.rank,
                 "debate_id": arg.debate_id,
-                "category": arg.category.value,
+                "category": _CATEGORY_VALUE[arg.category],
                 "title": arg.title,
                 "snippet": arg.snippet,
                 "subreddit": arg.subreddit,
@@ -373,18 +666,20 @@ class ProfileSynthesizer:
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
         fallacy_profile: FallacyProfile,
+        aggregate: Optional[QualityAggregate] = None,
+        debate_stats: Optional[DebateAggregate] = None,
     ) -> Dict[str, Any]:
         """Assess good faith using Claude"""
 
-        scores = list(quality_results.values())
+        if aggregate is None:
+            aggregate = QualityAggregate.from_qualities(quality_results.values())
+        if debate_stats is None:
+            debate_stats = DebateAggregate.from_debates(debates)
 
         # Calculate statistics
-        avg_civility = sum(q.civility_score for q in scores) / len(scores) if scores else 50
-        mind_changes = sum(1 for q in scores if q.changed_opponent_mind)
-        concessions = sum(
-            1 for d in debates
-            if d.metadata and d.metadata.apparent_outcome == "opponent_won"
-        )
+        avg_civility = aggregate.avg_civility(default=50)
+        mind_changes = aggregate.changed_minds
+        concessions = debate_stats.concessions
 
         # Build behavioral patterns
         patterns = []
@@ -405,9 +700,9 @@ class ProfileSynthesizer:
         if strawman_count >= 3:
             patterns.append(f"Strawman fallacy detected {strawman_count} times")
 
-        prompt = GOOD_FAITH_PROMPT.format(
+        prompt = _build_good_faith_prompt(
             username=username,
-            total_debates=len(debates),
+            total_debates=debate_stats.n,
             avg_civility=f"{avg_civility:.0f}",
             mind_changes=mind_changes,
             concessions=concessions,
@@ -416,7 +711,7 @@ class ProfileSynthesizer:
         )
 
         response = self.client.analyze(
-            system_prompt="You assess good faith in online debates based on behavioral patterns.",
+            system_prompt=GOOD_FAITH_SYSTEM_PROMPT,
             user_prompt=prompt,
         )
 
@@ -428,42 +723,55 @@ class ProfileSynthesizer:
         quality_results: Dict[str, ArgumentQuality],
     ) -> List[Dict[str, Any]]:
         """Build debate summary list"""
-        summaries = []
-
-        for debate in debates:
-            quality = quality_results.get(debate.thread_id)
-
-            summary = {
+        return [
+            {
                 "thread_id": debate.thread_id,
                 "thread_title": debate.thread_title[:100],
                 "subreddit": debate.subreddit,
                 "user_comment_count": debate.user_comment_count,
                 "user_is_op": debate.user_is_op,
+                **self._metadata_summary(debate.metadata),
+                **self._quality_summary(quality_results.get(debate.thread_id)),
             }
+            for debate in debates
+        ]
 
-            if debate.metadata:
-                summary["topic"] = debate.metadata.topic
-                summary["topic_category"] = debate.metadata.topic_category
-                summary["user_position"] = debate.metadata.user_position
-                summary["opponent_position"] = debate.metadata.opponent_position
-                summary["outcome"] = debate.metadata.apparent_outcome
-
-            if quality:
-                summary["quality"] = {
-                    "overall": quality.overall_score,
-                    "structure": quality.structure_score,
-                    "evidence": quality.evidence_score,
-                    "counterargument": quality.counterargument_score,
-                    "persuasiveness": quality.persuasiveness_score,
-                    "civility": quality.civility_score,
-                }
-                summary["is_top_argument"] = quality.is_top_argument_candidate
-                summary["changed_mind"] = quality.changed_opponent_mind
-
-            summaries.append(summary)
+    @staticmethod
+    def _metadata_summary(metadata: Optional[DebateMetadata]) -> Dict[str, Any]:
+        """Debate summary fields taken from identification metadata"""
+        if not metadata:
+            return {}
+        return {
+            "topic": metadata.topic,
+            "topic_category": metadata.topic_category,
+            "user_position": metadata.user_position,
+            "opponent_position": metadata.opponent_position,
+            "outcome": metadata.apparent_outcome,
+        }
 
-        return summaries
+    @staticmethod
+    def _quality_summary(quality: Optional[ArgumentQuality]) -> Dict[str, Any]:
+        """Debate summary fields taken from the argument quality result"""
+        if not quality:
+            return {}
+        return {
+            "quality": {
+                "overall": quality.overall_score,
+                "structure": quality.structure_score,
+                "evidence": quality.evidence_score,
+                "counterargument": quality.counterargument_score,
+                "persuasiveness": quality.persuasiveness_score,
+                "civility": quality.civility_score,
+            },
+            "is_top_argument": quality.is_top_argument_candidate,
+            "changed_mind": quality.changed_opponent_mind,
+        }
 
     def to_dict(self, profile: SynthesizedProfile) -> Dict[str, Any]:
-        """Convert SynthesizedProfile to dict for caching"""
-        return asdict(profile)
+        """
+        Convert SynthesizedProfile to dict for caching.
+
+        Every field already holds plain JSON values, so only the top level
+        is copied; nested dicts and lists are shared with the profile.
+        """
+        return {f.name: getattr(profile, f.name) for f in fields(profile)}
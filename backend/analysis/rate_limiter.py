@@ -0,0 +1,61 @@
+"""
+Token-bucket rate limiting for Claude API calls
+
+Paces requests under Anthropic's per-minute request (RPM) and token (TPM)
+limits so concurrent callers queue locally instead of collecting 429s.
+"""
+
+import time
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """
+    Token bucket shared by sync and async callers.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Each acquire reserves its tokens immediately (the balance may go
+    negative) and then sleeps until the reservation is covered, so
+    waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit: int) -> "TokenBucket":
+        """Bucket allowing `limit` units per rolling minute"""
+        return cls(rate=limit / 60.0, capacity=limit)
+
+    def _reserve(self, amount: float) -> float:
+        """Take `amount` tokens and return how long to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until `amount` tokens are available"""
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1) -> None:
+        """Wait without blocking the event loop until `amount` tokens are available"""
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -8,7 +8,10 @@ Identifies and ranks the user's best arguments with:
 - Signature technique identification
 """
 
+import heapq
+import io
 import logging
+from itertools import islice
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from enum import Enum
@@ -38,7 +41,9 @@ You can identify signature techniques and categorize arguments by their strength
 Always respond with valid JSON matching the requested schema."""
 
 
-TOP_ARGUMENTS_PROMPT = """Identify the TOP ARGUMENTS from this user's debate history.
+def _build_top_arguments_prompt(username: str, debate_details: str) -> str:
+    """Render the top arguments prompt (f-string compiled once, no per-call format parsing)"""
+    return f"""Identify the TOP ARGUMENTS from this user's debate history.
 
 ## User: u/{username}
 
@@ -160,7 +165,7 @@ Select up to 10 top arguments, prioritizing diversity across categories.
 For each argument, extract the BEST snippet (50-200 words) that showcases why it's exceptional."""
 
 
-@dataclass
+@dataclass(slots=True)
 class TopArgumentsResult:
     """Result of top arguments extraction"""
     top_arguments: List[TopArgument]
@@ -183,53 +188,61 @@ class TopArgumentsAnalyzer:
         max_debates: int = 20,
     ) -> str:
         """Format debate details for analysis"""
-        lines = []
+        buf = io.StringIO()
+        w = buf.write
 
-        # Sort by quality score
-        sorted_debates = sorted(
+        # Top debates by quality score; debates without a quality result rank last
+        overall_scores = {tid: q.overall_score for tid, q in quality_results.items()}
+        top_debates = heapq.nlargest(
+            max_debates,
             debates,
-            key=lambda d: quality_results.get(d.thread_id, ArgumentQuality(debate_id=d.thread_id)).overall_score,
-            reverse=True,
+            key=lambda d: overall_scores.get(d.thread_id, 0),
         )
 
-        for debate in sorted_debates[:max_debates]:
+        for debate in top_debates:
             quality = quality_results.get(debate.thread_id)
 
-            lines.append(f"\n### Thread: {debate.thread_id}")
-            lines.append(f"Subreddit: r/{debate.subreddit}")
-            lines.append(f"Title: {debate.thread_title[:100]}")
-
-            if debate.metadata:
-                lines.append(f"Topic: {debate.metadata.topic}")
-                lines.append(f"User Position: {debate.metadata.user_position}")
-                lines.append(f"Opponent Position: {debate.metadata.opponent_position}")
-                lines.append(f"Outcome: {debate.metadata.apparent_outcome}")
+            w(
+                f"\n### Thread: {debate.thread_id}\n"
+                f"Subreddit: r/{debate.subreddit}\n"
+                f"Title: {debate.thread_title[:100]}\n"
+            )
+
+            metadata = debate.metadata
+            if metadata:
+                w(
+                    f"Topic: {metadata.topic}\n"
+                    f"User Position: {metadata.user_position}\n"
+                    f"Opponent Position: {metadata.opponent_position}\n"
+                    f"Outcome: {metadata.apparent_outcome}\n"
+                )
 
             if quality:
-                lines.append(f"Quality Scores:")
-                lines.append(f"  Overall: {quality.overall_score}")
-                lines.append(f"  Structure: {quality.structure_score}")
-                lines.append(f"  Evidence: {quality.evidence_score}")
-                lines.append(f"  Counterargument: {quality.counterargument_score}")
-                lines.append(f"  Persuasiveness: {quality.persuasiveness_score}")
-                lines.append(f"  Civility: {quality.civility_score}")
+                w(
+                    "Quality Scores:\n"
+                    f"  Overall: {quality.overall_score}\n"
+                    f"  Structure: {quality.structure_score}\n"
+                    f"  Evidence: {quality.evidence_score}\n"
+                    f"  Counterargument: {quality.counterargument_score}\n"
+                    f"  Persuasiveness: {quality.persuasiveness_score}\n"
+                    f"  Civility: {quality.civility_score}\n"
+                )
 
                 if quality.changed_opponent_mind:
-                    lines.append(f"  ✓ Changed opponent's mind")
+                    w("  ✓ Changed opponent's mind\n")
                 if quality.opponent_concession_quote:
-                    lines.append(f"  Concession: \"{quality.opponent_concession_quote[:100]}\"")
+                    w(f"  Concession: \"{quality.opponent_concession_quote[:100]}\"\n")
                 if quality.is_top_argument_candidate:
-                    lines.append(f"  ⭐ Marked as top argument candidate")
+                    w("  ⭐ Marked as top argument candidate\n")
 
-            lines.append("\nUser Comments:")
-            for i, comment in enumerate(debate.user_comments[:3]):
-                body = comment.body[:500]
-                if len(comment.body) > 500:
-                    body += "..."
-                lines.append(f"[{comment.id}] {body}")
-                lines.append("")
+            w("\nUser Comments:\n")
+            for comment in islice(debate.user_comments, 3):
+                body = comment.body
+                if len(body) > 500:
+                    body = body[:500] + "..."
+                w(f"[{comment.id}] {body}\n\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def extract_top_arguments(
         self,
@@ -252,7 +265,7 @@ class TopArgumentsAnalyzer:
 
         debate_details = self._format_debate_details(debates, quality_results)
 
-        prompt = TOP_ARGUMENTS_PROMPT.format(
+        prompt = _build_top_arguments_prompt(
             username=username,
             debate_details=debate_details,
         )
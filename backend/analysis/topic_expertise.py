@@ -8,19 +8,31 @@ Analyzes debate history to determine:
 - Cross-domain connections
 """
 
+import heapq
+import io
 import logging
-from typing import List, Dict, Any, Optional
+import sys
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import Counter, defaultdict
+from itertools import islice
+from operator import attrgetter
 
 from analysis.claude_client import ClaudeClient
 from models.user_profile import (
     DebateThread,
     ArgumentQuality,
+    QualityAggregate,
 )
 
 logger = logging.getLogger(__name__)
 
+# Argument samples in the prompt: each is capped at SAMPLE_MAX_CHARS and all
+# of them together share SAMPLES_CHAR_BUDGET, so prolific users with many
+# topics don't inflate input tokens; later (smaller) topics lose samples first
+SAMPLE_MAX_CHARS = 300
+SAMPLES_CHAR_BUDGET = 8000
+
 
 SYSTEM_PROMPT = """You are an expert at assessing domain knowledge and expertise from argumentation.
 
@@ -35,22 +47,9 @@ You distinguish between:
 - Working knowledge (can discuss competently)
 - Casual familiarity (basic awareness only)
 
-Always respond with valid JSON matching the requested schema."""
-
-
-TOPIC_EXPERTISE_PROMPT = """Analyze this user's topic expertise based on their debate history.
-
-## User: u/{username}
-
-## Debates by Topic Category
-
-{debates_by_topic}
-
-## Quality Summary by Topic
-
-{quality_by_topic}
+Always report results through the provided tool.
 
-## Expertise Assessment Required
+## Expertise Assessment
 
 Evaluate the user's expertise across topics based on:
 
@@ -68,84 +67,105 @@ Evaluate the user's expertise across topics based on:
 - **Beginner** (25-49): Basic familiarity, struggles with complexity
 - **Novice** (0-24): Minimal knowledge, frequent errors
 
-## Required JSON Output
-
-{{
-    "username": "{username}",
-    "expertise_map": [
-        {{
-            "topic": "Economics",
-            "level": "advanced",
-            "score": 82,
-            "debate_count": 8,
-            "avg_quality": 78,
-            "evidence": [
-                "Correctly applies marginal utility concepts",
-                "Cites academic economic research appropriately",
-                "Distinguishes between macro and microeconomic effects"
-            ],
-            "notable_debates": [
-                {{
-                    "debate_id": "abc123",
-                    "title": "Minimum wage effects",
-                    "quality_score": 85
-                }}
-            ],
-            "growth_potential": "Could strengthen empirical methodology"
-        }},
-        {{
-            "topic": "Technology",
-            "level": "expert",
-            "score": 91,
-            "debate_count": 12,
-            "avg_quality": 86,
-            "evidence": [
-                "Demonstrates deep understanding of system architecture",
-                "Uses technical terminology precisely",
-                "Can explain complex concepts clearly"
-            ],
-            "notable_debates": [],
-            "growth_potential": "Already at expert level"
-        }},
-        {{
-            "topic": "Philosophy",
-            "level": "intermediate",
-            "score": 58,
-            "debate_count": 3,
-            "avg_quality": 62,
-            "evidence": [
-                "Familiar with major philosophical positions",
-                "Sometimes conflates related but distinct concepts"
-            ],
-            "notable_debates": [],
-            "growth_potential": "Could benefit from studying primary sources"
-        }}
-    ],
-    "knowledge_profile": {{
-        "breadth": "moderate",
-        "depth": "variable",
-        "primary_domains": ["Technology", "Economics"],
-        "emerging_interests": ["Philosophy"],
-        "cross_domain_connections": [
-            "Applies economic reasoning to technology policy debates",
-            "Connects philosophical ethics to practical technology decisions"
-        ]
-    }},
-    "credibility_assessment": {{
-        "strongest_areas": ["Technology", "Economics"],
-        "weakest_areas": ["Philosophy"],
-        "overall_credibility": "high",
-        "notes": "Strong technical background with solid analytical skills. Most credible in STEM and quantitative topics."
-    }},
-    "recommendations": [
-        "Continue developing philosophical foundations",
-        "Consider engaging more with empirical social science",
-        "Leverage cross-domain expertise in technology policy"
-    ]
-}}
-
 Breadth levels: narrow (1-2 topics), moderate (3-5 topics), broad (6+ topics)
-Depth levels: shallow (mostly beginner/novice), variable (mixed), deep (mostly advanced/expert)"""
+Depth levels: shallow (mostly beginner/novice), variable (mixed), deep (mostly advanced/expert)
+
+## Output
+
+Report the assessment with the report_topic_expertise tool."""
+
+
+def _build_topic_expertise_prompt(
+    username: str,
+    debates_by_topic: str,
+    quality_by_topic: str,
+) -> str:
+    """Render the topic expertise prompt (f-string compiled once, no per-call format parsing)"""
+    return f"""Analyze this user's topic expertise based on their debate history.
+
+## User: u/{username}
+
+## Debates by Topic Category
+
+{debates_by_topic}
+
+## Quality Summary by Topic
+
+{quality_by_topic}"""
+
+
+EXPERTISE_LEVELS = ("expert", "advanced", "intermediate", "beginner", "novice")
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+_SCORE = {"type": "integer", "minimum": 0, "maximum": 100}
+
+EXPERTISE_TOOL = {
+    "name": "report_topic_expertise",
+    "description": "Report the user's expertise by topic and their overall knowledge profile.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "username": {"type": "string"},
+            "expertise_map": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "topic": {"type": "string"},
+                        "level": {"type": "string", "enum": list(EXPERTISE_LEVELS)},
+                        "score": _SCORE,
+                        "debate_count": {"type": "integer", "minimum": 0},
+                        "avg_quality": {"type": "number", "minimum": 0, "maximum": 100},
+                        "evidence": _STRING_LIST,
+                        "notable_debates": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "debate_id": {"type": "string"},
+                                    "title": {"type": "string"},
+                                    "quality_score": _SCORE,
+                                },
+                                "required": ["debate_id", "title", "quality_score"],
+                            },
+                        },
+                        "growth_potential": {"type": "string"},
+                    },
+                    "required": ["topic", "level", "score", "debate_count", "avg_quality", "evidence"],
+                },
+            },
+            "knowledge_profile": {
+                "type": "object",
+                "properties": {
+                    "breadth": {"type": "string", "enum": ["narrow", "moderate", "broad"]},
+                    "depth": {"type": "string", "enum": ["shallow", "variable", "deep"]},
+                    "primary_domains": _STRING_LIST,
+                    "emerging_interests": _STRING_LIST,
+                    "cross_domain_connections": _STRING_LIST,
+                },
+                "required": [
+                    "breadth",
+                    "depth",
+                    "primary_domains",
+                    "emerging_interests",
+                    "cross_domain_connections",
+                ],
+            },
+            "credibility_assessment": {
+                "type": "object",
+                "properties": {
+                    "strongest_areas": _STRING_LIST,
+                    "weakest_areas": _STRING_LIST,
+                    "overall_credibility": {"type": "string", "enum": ["low", "medium", "high"]},
+                    "notes": {"type": "string"},
+                },
+                "required": ["strongest_areas", "weakest_areas", "overall_credibility"],
+            },
+            "recommendations": _STRING_LIST,
+        },
+        "required": ["expertise_map", "knowledge_profile", "credibility_assessment", "recommendations"],
+    },
+}
 
 
 @dataclass
@@ -186,92 +206,102 @@ class TopicExpertiseAnalyzer:
     """
 
     def __init__(self, claude_client: ClaudeClient):
+        # Borrowed, not owned: pass the app-wide client so this analyzer
+        # rides the same pooled keep-alive (HTTP/2) connections as the rest
         self.client = claude_client
 
     def _group_debates_by_topic(
         self,
         debates: List[DebateThread],
-    ) -> Dict[str, List[DebateThread]]:
-        """Group debates by topic category"""
-        by_topic: Dict[str, List[DebateThread]] = defaultdict(list)
+        quality_results: Dict[str, ArgumentQuality],
+    ) -> Dict[str, List[Tuple[DebateThread, Optional[ArgumentQuality]]]]:
+        """Group debates by topic category, each paired with its quality result"""
+        by_topic: Dict[str, List[Tuple[DebateThread, Optional[ArgumentQuality]]]] = defaultdict(list)
+        get_quality = quality_results.get
 
+        # One hash-bucketed pass; metadata is read once per debate. Interned
+        # keys collapse the per-debate category strings to one object each
         for debate in debates:
-            category = "other"
-            if debate.metadata and debate.metadata.topic_category:
-                category = debate.metadata.topic_category
-
-            by_topic[category].append(debate)
+            metadata = debate.metadata
+            category = sys.intern(((metadata and metadata.topic_category) or "other").lower())
+            by_topic[category].append((debate, get_quality(debate.thread_id)))
 
         return dict(by_topic)
 
     def _format_debates_by_topic(
         self,
-        debates_by_topic: Dict[str, List[DebateThread]],
-        quality_results: Dict[str, ArgumentQuality],
+        debates_by_topic: Dict[str, List[Tuple[DebateThread, Optional[ArgumentQuality]]]],
+        titles: Dict[str, str],
     ) -> str:
         """Format debates grouped by topic"""
-        lines = []
+        buf = io.StringIO()
+        w = buf.write
+        remaining = SAMPLES_CHAR_BUDGET
 
         for topic, debates in sorted(debates_by_topic.items(), key=lambda x: len(x[1]), reverse=True):
-            lines.append(f"\n## {topic.title()} ({len(debates)} debates)")
+            w(f"\n## {titles[topic]} ({len(debates)} debates)\n")
 
-            for debate in debates[:5]:
-                quality = quality_results.get(debate.thread_id)
+            for debate, quality in islice(debates, 5):
+                w(
+                    f"\n### {debate.thread_title[:80]}\n"
+                    f"Subreddit: r/{debate.subreddit}\n"
+                )
 
-                lines.append(f"\n### {debate.thread_title[:80]}")
-                lines.append(f"Subreddit: r/{debate.subreddit}")
-
-                if debate.metadata:
-                    lines.append(f"Topic: {debate.metadata.topic}")
-                    lines.append(f"Position: {debate.metadata.user_position}")
+                metadata = debate.metadata
+                if metadata:
+                    w(
+                        f"Topic: {metadata.topic}\n"
+                        f"Position: {metadata.user_position}\n"
+                    )
 
                 if quality:
-                    lines.append(f"Quality: {quality.overall_score}")
-                    lines.append(f"Evidence Score: {quality.evidence_score}")
+                    w(
+                        f"Quality: {quality.overall_score}\n"
+                        f"Evidence Score: {quality.evidence_score}\n"
+                    )
 
-                # Sample argument
-                if debate.user_comments:
-                    sample = debate.user_comments[0].body[:300]
-                    lines.append(f"Sample: \"{sample}...\"")
+                # Sample argument, while the shared budget lasts
+                if debate.user_comments and remaining > 0:
+                    sample = debate.user_comments[0].body[:min(SAMPLE_MAX_CHARS, remaining)]
+                    remaining -= len(sample)
+                    w(f"Sample: \"{sample}...\"\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def _format_quality_by_topic(
         self,
-        debates_by_topic: Dict[str, List[DebateThread]],
-        quality_results: Dict[str, ArgumentQuality],
+        debates_by_topic: Dict[str, List[Tuple[DebateThread, Optional[ArgumentQuality]]]],
+        titles: Dict[str, str],
     ) -> str:
         """Format quality statistics by topic"""
-        lines = []
+        buf = io.StringIO()
+        w = buf.write
 
         for topic, debates in sorted(debates_by_topic.items()):
-            qualities = [
-                quality_results[d.thread_id]
-                for d in debates
-                if d.thread_id in quality_results
-            ]
+            aggregate = QualityAggregate.from_qualities(
+                quality for _, quality in debates if quality is not None
+            )
 
-            if not qualities:
+            if not aggregate.n:
                 continue
 
-            avg_overall = sum(q.overall_score for q in qualities) / len(qualities)
-            avg_evidence = sum(q.evidence_score for q in qualities) / len(qualities)
-            avg_structure = sum(q.structure_score for q in qualities) / len(qualities)
+            w(
+                f"\n{titles[topic]}:\n"
+                f"  Debates: {aggregate.n}\n"
+                f"  Avg Overall: {aggregate.avg_overall():.0f}\n"
+                f"  Avg Evidence: {aggregate.avg_evidence():.0f}\n"
+                f"  Avg Structure: {aggregate.avg_structure():.0f}\n"
+            )
 
-            lines.append(f"\n{topic.title()}:")
-            lines.append(f"  Debates: {len(qualities)}")
-            lines.append(f"  Avg Overall: {avg_overall:.0f}")
-            lines.append(f"  Avg Evidence: {avg_evidence:.0f}")
-            lines.append(f"  Avg Structure: {avg_structure:.0f}")
-
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def analyze_expertise(
         self,
         username: str,
         debates: List[DebateThread],
         quality_results: Dict[str, ArgumentQuality],
-    ) -> TopicExpertiseResult:
+        stream: bool = False,
+    ) -> Union[TopicExpertiseResult, Iterator[TopicExpertiseResult]]:
         """
         Analyze user's topic expertise across debates.
 
@@ -279,29 +309,67 @@ class TopicExpertiseAnalyzer:
             username: Reddit username
             debates: List of debate threads
             quality_results: Quality analysis results
+            stream: Yield progressively filled results as Claude's response arrives
 
         Returns:
-            TopicExpertiseResult with expertise map and profile
+            TopicExpertiseResult with expertise map and profile, or an
+            iterator of partial TopicExpertiseResults when stream=True
         """
         logger.info(f"Analyzing topic expertise for u/{username}")
 
-        debates_by_topic = self._group_debates_by_topic(debates)
-        debates_formatted = self._format_debates_by_topic(debates_by_topic, quality_results)
-        quality_formatted = self._format_quality_by_topic(debates_by_topic, quality_results)
+        prompt = self._build_prompt(username, debates, quality_results)
 
-        prompt = TOPIC_EXPERTISE_PROMPT.format(
-            username=username,
-            debates_by_topic=debates_formatted,
-            quality_by_topic=quality_formatted,
-        )
+        if stream:
+            return (
+                self._parse_response(partial)
+                for partial in self.client.analyze_stream(
+                    system_prompt=SYSTEM_PROMPT,
+                    user_prompt=prompt,
+                    tool=EXPERTISE_TOOL,
+                )
+            )
 
         response = self.client.analyze(
             system_prompt=SYSTEM_PROMPT,
             user_prompt=prompt,
+            tool=EXPERTISE_TOOL,
+        )
+
+        return self._parse_response(response)
+
+    async def aanalyze_expertise(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+    ) -> TopicExpertiseResult:
+        """Async variant of analyze_expertise()"""
+        logger.info(f"Analyzing topic expertise for u/{username}")
+
+        response = await self.client.aanalyze(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=self._build_prompt(username, debates, quality_results),
+            tool=EXPERTISE_TOOL,
         )
 
         return self._parse_response(response)
 
+    def _build_prompt(
+        self,
+        username: str,
+        debates: List[DebateThread],
+        quality_results: Dict[str, ArgumentQuality],
+    ) -> str:
+        """Topic expertise prompt for a user's debate history"""
+        debates_by_topic = self._group_debates_by_topic(debates, quality_results)
+        titles = {topic: topic.title() for topic in debates_by_topic}
+
+        return _build_topic_expertise_prompt(
+            username=username,
+            debates_by_topic=self._format_debates_by_topic(debates_by_topic, titles),
+            quality_by_topic=self._format_quality_by_topic(debates_by_topic, titles),
+        )
+
     def _parse_response(self, response: Dict) -> TopicExpertiseResult:
         """Parse topic expertise response"""
 
@@ -342,12 +410,9 @@ class TopicExpertiseAnalyzer:
     ) -> Dict[str, Any]:
         """Generate a summary of expertise for display"""
 
-        # Sort by score
-        sorted_expertise = sorted(
-            result.expertise_map,
-            key=lambda x: x.score,
-            reverse=True,
-        )
+        # Only the top 5 are shown, so a bounded heap beats a full sort
+        top_expertise = heapq.nlargest(5, result.expertise_map, key=attrgetter("score"))
+        level_counts = Counter(e.level for e in result.expertise_map)
 
         return {
             "top_domains": [
@@ -356,12 +421,12 @@ class TopicExpertiseAnalyzer:
                     "level": exp.level,
                     "score": exp.score,
                 }
-                for exp in sorted_expertise[:5]
+                for exp in top_expertise
             ],
             "breadth": result.knowledge_profile.breadth,
             "depth": result.knowledge_profile.depth,
-            "strongest_area": sorted_expertise[0].topic if sorted_expertise else None,
+            "strongest_area": top_expertise[0].topic if top_expertise else None,
             "total_topics": len(result.expertise_map),
-            "expert_level_count": sum(1 for e in result.expertise_map if e.level == "expert"),
-            "advanced_level_count": sum(1 for e in result.expertise_map if e.level == "advanced"),
+            "expert_level_count": level_counts["expert"],
+            "advanced_level_count": level_counts["advanced"],
         }
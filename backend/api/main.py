@@ -8,17 +8,27 @@ Provides REST endpoints for:
 - Cache management
 """
 
+import asyncio
+import json
 import logging
 from typing import Optional, Dict, Any
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config import Config
 from cache.cache_manager import CacheManager
+from cache.redis_cache import RedisCacheManager
 from data.reddit_fetcher import RedditFetcher
 from analysis.claude_client import ClaudeClient
 from analysis.debate_identifier import DebateIdentifier
@@ -27,11 +37,16 @@ from analysis.profile_synthesizer import ProfileSynthesizer
 
 logger = logging.getLogger(__name__)
 
+# orjson renders responses (datetimes included) much faster than stdlib json;
+# ORJSONResponse needs it installed, so fall back to the default otherwise
+DEFAULT_RESPONSE_CLASS = ORJSONResponse if orjson is not None else JSONResponse
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Debate Analytics API",
     description="Analyze Reddit users' debate patterns and argumentation quality",
     version="0.1.0",
+    default_response_class=DEFAULT_RESPONSE_CLASS,
 )
 
 # CORS middleware for frontend
@@ -85,65 +100,119 @@ class HealthResponse(BaseModel):
     cache_stats: Optional[Dict[str, Any]] = None
 
 
-# In-memory job tracking (would use Redis in production)
-_analysis_jobs: Dict[str, AnalysisStatus] = {}
-
-
+# Providers are built once per process and handed to endpoints via Depends,
+# so env parsing, cache directory setup and HTTP pools aren't redone per request
+@lru_cache(maxsize=1)
 def get_config() -> Config:
-    """Get configuration instance"""
+    """Get the shared configuration instance"""
     return Config.from_env()
 
 
+@lru_cache(maxsize=1)
 def get_cache_manager() -> CacheManager:
-    """Get cache manager instance"""
+    """Get the shared cache manager instance (file or Redis, per CACHE_BACKEND)"""
     config = get_config()
+    if config.cache_backend == "redis":
+        return RedisCacheManager(
+            cache_dir=Path(config.cache_dir),
+            redis_url=config.redis_url,
+            ttl_hours=config.cache_ttl_hours,
+        )
     return CacheManager(
         cache_dir=Path(config.cache_dir),
         ttl_hours=config.cache_ttl_hours,
     )
 
 
+@lru_cache(maxsize=1)
 def get_reddit_fetcher() -> RedditFetcher:
-    """Get Reddit fetcher instance"""
+    """Get the shared Reddit fetcher instance"""
     return RedditFetcher()
 
 
+@lru_cache(maxsize=1)
 def get_claude_client() -> ClaudeClient:
-    """Get Claude client instance"""
+    """Get the shared Claude client instance"""
     config = get_config()
     return ClaudeClient(
         api_key=config.anthropic_api_key,
         model=config.claude_model,
+        rpm=config.claude_rpm,
+        tpm=config.claude_tpm,
+        response_cache=get_cache_manager(),
     )
 
 
+@app.on_event("shutdown")
+async def close_claude_client():
+    """Release pooled Claude connections on shutdown"""
+    if get_claude_client.cache_info().currsize:
+        client = get_claude_client()
+        client.close()
+        await client.aclose()
+        get_claude_client.cache_clear()
+
+
+@app.on_event("shutdown")
+async def close_cache_manager():
+    """Release pooled Redis connections on shutdown"""
+    if get_cache_manager.cache_info().currsize:
+        cache = get_cache_manager()
+        if isinstance(cache, RedisCacheManager):
+            cache.close()
+            await cache.aclose()
+        get_cache_manager.cache_clear()
+
+
 # Health and status endpoints
-@router.get("/health")
+# These return fixed-shape dicts, so they hand back a response directly
+# instead of paying for jsonable_encoder and response validation
+_HEALTH_STATIC = {"version": "0.1.0"}
+
+
+@router.get("/health", response_model=None)
 async def health_check():
     """Health check endpoint - minimal for Railway"""
-    return {
+    return DEFAULT_RESPONSE_CLASS({
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "version": "0.1.0",
-    }
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **_HEALTH_STATIC,
+    })
 
 
-@router.get("/status")
-async def api_status():
+@router.get("/status", response_model=None)
+async def api_status(
+    config: Config = Depends(get_config),
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Get API status and configuration"""
-    config = get_config()
-    cache = get_cache_manager()
-
-    return {
+    return DEFAULT_RESPONSE_CLASS({
         "api_version": "0.1.0",
         "claude_model": config.claude_model,
         "cache_ttl_hours": config.cache_ttl_hours,
-        "cache_stats": cache.get_cache_stats(),
-        "active_jobs": len([j for j in _analysis_jobs.values() if j.status == "in_progress"]),
-    }
+        "cache_stats": await cache.aget_cache_stats(),
+        "active_jobs": await cache.acount_jobs("in_progress"),
+    })
 
 
 # User profile endpoints
+# Profile fields every /profile response reads; optional sections are
+# requested on top of these according to the include_* flags
+PROFILE_CORE_FIELDS = (
+    "_cached_at",
+    "analyzed_at",
+    "overall_score",
+    "archetype",
+    "mbti",
+    "good_faith",
+    "quality_breakdown",
+    "knowledge_profile",
+    "signature_techniques",
+    "debates_analyzed",
+    "total_comments",
+)
+
+
 @router.get("/users/{username}/profile")
 async def get_user_profile(
     username: str,
@@ -151,6 +220,7 @@ async def get_user_profile(
     include_fallacies: bool = Query(False, description="Include fallacy details"),
     include_top_arguments: bool = Query(False, description="Include top arguments"),
     include_expertise: bool = Query(False, description="Include topic expertise details"),
+    cache: CacheManager = Depends(get_cache_manager),
 ):
     """
     Get a user's debate profile.
@@ -158,10 +228,18 @@ async def get_user_profile(
     Returns cached profile if available, otherwise returns summary
     indicating analysis is needed.
     """
-    cache = get_cache_manager()
-
-    # Check for cached profile
-    cached_data = cache.get_user_cache(username)
+    # Fetch only the sections this response renders
+    fields = list(PROFILE_CORE_FIELDS)
+    if include_debates:
+        fields.append("debates")
+    if include_fallacies:
+        fields.append("fallacy_profile")
+    if include_top_arguments:
+        fields.append("top_arguments")
+    if include_expertise:
+        fields.append("topic_expertise")
+
+    cached_data = await cache.aget_user_fields(username, fields)
 
     if cached_data is None:
         # No cached data - return indication that analysis is needed
@@ -220,10 +298,12 @@ async def get_user_profile(
 
 
 @router.get("/users/{username}/fallacies")
-async def get_user_fallacies(username: str):
+async def get_user_fallacies(
+    username: str,
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Get user's fallacy profile"""
-    cache = get_cache_manager()
-    cached_data = cache.get_user_cache(username)
+    cached_data = await cache.aget_user_fields(username, ["fallacy_profile"])
 
     if cached_data is None:
         raise HTTPException(status_code=404, detail="User profile not found")
@@ -239,10 +319,10 @@ async def get_user_top_arguments(
     username: str,
     category: Optional[str] = Query(None, description="Filter by category"),
     limit: int = Query(10, ge=1, le=50, description="Max arguments to return"),
+    cache: CacheManager = Depends(get_cache_manager),
 ):
     """Get user's top arguments"""
-    cache = get_cache_manager()
-    cached_data = cache.get_user_cache(username)
+    cached_data = await cache.aget_user_fields(username, ["top_arguments", "signature_techniques"])
 
     if cached_data is None:
         raise HTTPException(status_code=404, detail="User profile not found")
@@ -262,10 +342,12 @@ async def get_user_top_arguments(
 
 
 @router.get("/users/{username}/expertise")
-async def get_user_expertise(username: str):
+async def get_user_expertise(
+    username: str,
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Get user's topic expertise"""
-    cache = get_cache_manager()
-    cached_data = cache.get_user_cache(username)
+    cached_data = await cache.aget_user_fields(username, ["topic_expertise", "knowledge_profile"])
 
     if cached_data is None:
         raise HTTPException(status_code=404, detail="User profile not found")
@@ -278,10 +360,12 @@ async def get_user_expertise(username: str):
 
 
 @router.get("/users/{username}/archetype")
-async def get_user_archetype(username: str):
+async def get_user_archetype(
+    username: str,
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Get user's debate archetype and MBTI"""
-    cache = get_cache_manager()
-    cached_data = cache.get_user_cache(username)
+    cached_data = await cache.aget_user_fields(username, ["archetype", "mbti"])
 
     if cached_data is None:
         raise HTTPException(status_code=404, detail="User profile not found")
@@ -298,6 +382,7 @@ async def analyze_user(
     username: str,
     request: AnalyzeRequest,
     background_tasks: BackgroundTasks,
+    cache: CacheManager = Depends(get_cache_manager),
 ):
     """
     Trigger analysis for a Reddit user.
@@ -310,11 +395,9 @@ async def analyze_user(
 
     Returns immediately with job ID for status polling.
     """
-    cache = get_cache_manager()
-
     # Check if we have cached data and refresh not forced
     if not request.force_refresh:
-        cached = cache.get_user_cache(username)
+        cached = await cache.aget_user_cache(username)
         if cached:
             return {
                 "username": username,
@@ -323,16 +406,16 @@ async def analyze_user(
                 "cached_at": cached.get("_cached_at"),
             }
 
-    # Check if analysis already in progress
-    if username in _analysis_jobs:
-        job = _analysis_jobs[username]
-        if job.status == "in_progress":
-            return {
-                "username": username,
-                "status": "in_progress",
-                "message": "Analysis already in progress",
-                "started_at": job.started_at,
-            }
+    # Check if analysis already queued or in progress; a queued job may wait
+    # behind MAX_CONCURRENT_PIPELINES, and re-queuing it would run it twice
+    existing = await cache.aget_job_status(username)
+    if existing and existing.get("status") in ("pending", "in_progress"):
+        return {
+            "username": username,
+            "status": existing["status"],
+            "message": "Analysis already queued or in progress",
+            "started_at": existing.get("started_at"),
+        }
 
     # Create job entry
     job = AnalysisStatus(
@@ -341,7 +424,7 @@ async def analyze_user(
         started_at=datetime.now(),
         progress={"stage": "queued"},
     )
-    _analysis_jobs[username] = job
+    await _save_job(cache, job)
 
     # Queue background analysis
     background_tasks.add_task(
@@ -349,6 +432,7 @@ async def analyze_user(
         username,
         request.max_comments,
         request.max_threads,
+        request.force_refresh,
     )
 
     return {
@@ -360,12 +444,15 @@ async def analyze_user(
 
 
 @router.get("/users/{username}/analyze/status")
-async def get_analysis_status(username: str):
+async def get_analysis_status(
+    username: str,
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Get status of an analysis job"""
-    if username not in _analysis_jobs:
+    job = await cache.aget_job_status(username)
+    if job is None:
         # Check cache for completed analysis
-        cache = get_cache_manager()
-        cached = cache.get_user_cache(username)
+        cached = await cache.aget_user_cache(username)
 
         if cached:
             return {
@@ -380,22 +467,23 @@ async def get_analysis_status(username: str):
             "message": "No analysis job found for this user",
         }
 
-    job = _analysis_jobs[username]
     return {
         "username": username,
-        "status": job.status,
-        "started_at": job.started_at,
-        "completed_at": job.completed_at,
-        "progress": job.progress,
-        "error": job.error,
+        "status": job.get("status"),
+        "started_at": job.get("started_at"),
+        "completed_at": job.get("completed_at"),
+        "progress": job.get("progress"),
+        "error": job.get("error"),
     }
 
 
 @router.delete("/users/{username}/cache")
-async def invalidate_user_cache(username: str):
+async def invalidate_user_cache(
+    username: str,
+    cache: CacheManager = Depends(get_cache_manager),
+):
     """Invalidate cached data for a user"""
-    cache = get_cache_manager()
-    removed = cache.invalidate_user(username)
+    removed = await cache.ainvalidate_user(username)
 
     return {
         "username": username,
@@ -405,53 +493,81 @@ async def invalidate_user_cache(username: str):
 
 # Cache management endpoints
 @router.get("/cache/stats")
-async def get_cache_stats():
+async def get_cache_stats(cache: CacheManager = Depends(get_cache_manager)):
     """Get cache statistics"""
-    cache = get_cache_manager()
-    return cache.get_cache_stats()
+    return await cache.aget_cache_stats()
 
 
 @router.post("/cache/cleanup")
-async def cleanup_cache():
+async def cleanup_cache(cache: CacheManager = Depends(get_cache_manager)):
     """Remove expired cache entries"""
-    cache = get_cache_manager()
-    removed = cache.cleanup_expired()
+    removed = await cache.acleanup_expired()
 
     return {
         "expired_entries_removed": removed,
-        "current_stats": cache.get_cache_stats(),
+        "current_stats": await cache.aget_cache_stats(),
     }
 
 
 # Background analysis pipeline
+async def _save_job(cache: CacheManager, job: AnalysisStatus) -> None:
+    """Publish a job's current state through the cache so every worker sees it"""
+    await cache.aset_job_status(job.username, job.model_dump(mode="json"))
+
+
+# Each pipeline fans out into many concurrent Claude calls; capping how many
+# run at once keeps a burst of jobs from stampeding into 429 retries
+MAX_CONCURRENT_PIPELINES = 4
+
+_pipeline_slots = asyncio.Semaphore(MAX_CONCURRENT_PIPELINES)
+
+
 async def run_analysis_pipeline(
     username: str,
     max_comments: int,
     max_threads: int,
+    force_refresh: bool = False,
 ):
     """
     Run the full analysis pipeline for a user.
 
-    This is executed as a background task.
+    This is executed as a background task. Jobs beyond
+    MAX_CONCURRENT_PIPELINES stay pending until a slot frees up.
     """
-    from dataclasses import asdict
+    async with _pipeline_slots:
+        await _run_analysis_pipeline(username, max_comments, max_threads, force_refresh)
 
-    job = _analysis_jobs.get(username)
-    if not job:
-        return
 
+async def _run_analysis_pipeline(
+    username: str,
+    max_comments: int,
+    max_threads: int,
+    force_refresh: bool,
+):
+    """Pipeline body; blocking stages run in worker threads off the event loop"""
+    cache = get_cache_manager()
+    # The record was written when the job was queued; if it can't be read
+    # back (e.g. a Redis blip), start a fresh one rather than drop the job
+    job_data = await cache.aget_job_status(username)
+    job = (
+        AnalysisStatus(**job_data)
+        if job_data
+        else AnalysisStatus(username=username, status="pending", started_at=datetime.now())
+    )
     job.status = "in_progress"
+    await _save_job(cache, job)
 
     try:
-        cache = get_cache_manager()
         reddit = get_reddit_fetcher()
         claude = get_claude_client()
 
         # Stage 1: Fetch Reddit data
         job.progress = {"stage": "fetching_data", "percent": 10}
+        await _save_job(cache, job)
         logger.info(f"Fetching Reddit data for u/{username}")
 
-        user_data = reddit.fetch_user_data(
+        user_data = await asyncio.to_thread(
+            reddit.fetch_user_data,
             username=username,
             comment_limit=max_comments,
         )
@@ -459,13 +575,16 @@ async def run_analysis_pipeline(
         if not user_data["comments"]:
             job.status = "failed"
             job.error = "No comments found for user"
+            await _save_job(cache, job)
             return
 
         # Stage 2: Build debate threads
         job.progress = {"stage": "building_threads", "percent": 25}
+        await _save_job(cache, job)
         logger.info(f"Building debate threads for u/{username}")
 
-        threads = reddit.build_debate_threads(
+        threads = await asyncio.to_thread(
+            reddit.build_debate_threads,
             username=username,
             comments=user_data["comments"],
             max_threads=max_threads,
@@ -473,6 +592,7 @@ async def run_analysis_pipeline(
 
         # Stage 3: Identify debates
         job.progress = {"stage": "identifying_debates", "percent": 40}
+        await _save_job(cache, job)
         logger.info(f"Identifying debates for u/{username}")
 
         identifier = DebateIdentifier(claude)
@@ -481,9 +601,10 @@ async def run_analysis_pipeline(
         potential_debates = identifier.quick_filter(threads)
 
         # Claude identification
-        identified_threads = identifier.identify_debates(
+        identified_threads = await identifier.aidentify_debates(
             username=username,
             threads=potential_debates,
+            batch_size=get_config().batch_size,
         )
 
         debates = [t for t in identified_threads if t.is_debate]
@@ -498,42 +619,52 @@ async def run_analysis_pipeline(
                 "total_threads": len(threads),
                 "message": "No debates found in comment history",
             }
-            cache.set_user_cache(username, profile_data)
+            await cache.aset_user_cache(username, profile_data)
             job.status = "completed"
             job.completed_at = datetime.now()
             job.progress = {"stage": "completed", "percent": 100}
+            await _save_job(cache, job)
             return
 
         # Stage 4: Analyze argument quality
         job.progress = {"stage": "analyzing_arguments", "percent": 55}
+        await _save_job(cache, job)
         logger.info(f"Analyzing argument quality for u/{username}")
 
         analyzer = ArgumentAnalyzer(claude)
-        quality_results = analyzer.analyze_debates_batch(debates)
+        quality_results = await analyzer.aanalyze_debates_batch(debates)
 
         # Stage 5: Synthesize comprehensive profile
         job.progress = {"stage": "synthesizing_profile", "percent": 70}
+        await _save_job(cache, job)
         logger.info(f"Synthesizing comprehensive profile for u/{username}")
 
-        synthesizer = ProfileSynthesizer(claude)
-        synthesized_profile = synthesizer.synthesize(
+        synthesizer = ProfileSynthesizer(
+            claude,
+            use_batch_api=get_config().claude_use_batch_api,
+            cache=cache,
+        )
+        synthesized_profile = await synthesizer.asynthesize(
             username=username,
             debates=debates,
             quality_results=quality_results,
             run_all_analyses=True,
+            force_refresh=force_refresh,
         )
 
         job.progress = {"stage": "caching_results", "percent": 95}
+        await _save_job(cache, job)
 
         # Cache the profile
-        profile_data = asdict(synthesized_profile)
+        profile_data = synthesizer.to_dict(synthesized_profile)
         profile_data["total_threads"] = len(threads)
-        cache.set_user_cache(username, profile_data)
+        await cache.aset_user_cache(username, profile_data)
 
         # Complete
         job.status = "completed"
         job.completed_at = datetime.now()
         job.progress = {"stage": "completed", "percent": 100}
+        await _save_job(cache, job)
 
         logger.info(f"Analysis complete for u/{username}: {len(debates)} debates analyzed")
 
@@ -542,6 +673,7 @@ async def run_analysis_pipeline(
         job.status = "failed"
         job.error = str(e)
         job.completed_at = datetime.now()
+        await _save_job(cache, job)
 
 
 # Mount router to app
@@ -549,15 +681,20 @@ app.include_router(router)
 
 
 # Root endpoint
-@app.get("/")
+# The payload never changes, so it is serialized once at import
+_ROOT_INFO = {
+    "name": "Debate Analytics API",
+    "version": "0.1.0",
+    "docs": "/docs",
+    "health": "/api/v1/health",
+}
+_ROOT_BODY = orjson.dumps(_ROOT_INFO) if orjson is not None else json.dumps(_ROOT_INFO).encode()
+
+
+@app.get("/", response_model=None)
 async def root():
     """Root endpoint with API info"""
-    return {
-        "name": "Debate Analytics API",
-        "version": "0.1.0",
-        "docs": "/docs",
-        "health": "/api/v1/health",
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -2,18 +2,33 @@
 JSON-based caching for analysis results
 """
 
+import asyncio
 import json
 import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, TypeVar, Type
+from typing import Optional, Dict, Any, Iterable, Tuple, TypeVar, Type
 from dataclasses import asdict, is_dataclass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# In-memory copies of recently read user profiles. Every profile endpoint
+# re-reads the same file, so hot users are served from RAM while the file's
+# mtime is unchanged and the copy is younger than the hot TTL
+USER_HOT_CACHE_SIZE = 256
+USER_HOT_CACHE_TTL_SECONDS = 5.0
+
 
 class CacheManager:
     """
@@ -24,6 +39,9 @@ class CacheManager:
     - Organized directory structure
     - Incremental updates
     - Cache statistics
+
+    The a-prefixed methods are async variants for request handlers; they run
+    the same file I/O in a worker thread so the event loop never blocks on disk.
     """
 
     def __init__(
@@ -38,10 +56,20 @@ class CacheManager:
         self.users_dir = self.cache_dir / "users"
         self.debates_dir = self.cache_dir / "debates"
         self.analysis_dir = self.cache_dir / "analysis"
+        self.responses_dir = self.cache_dir / "responses"
 
-        for dir_path in [self.users_dir, self.debates_dir, self.analysis_dir]:
+        for dir_path in [self.users_dir, self.debates_dir, self.analysis_dir, self.responses_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
+        # username -> (stored_at, file mtime, data), least recently used first.
+        # Guarded by a lock since the async variants read from worker threads
+        self._hot_users: "OrderedDict[str, Tuple[float, float, Dict]]" = OrderedDict()
+        self._hot_lock = threading.Lock()
+
+        # Analysis job status by lowercased username. Process-local, so it is
+        # only shared by requests served from this worker
+        self._jobs: Dict[str, Dict] = {}
+
     def _get_user_cache_path(self, username: str) -> Path:
         """Get cache file path for a user"""
         return self.users_dir / f"{username.lower()}.json"
@@ -54,13 +82,66 @@ class CacheManager:
         """Get cache file path for an analysis result"""
         return self.analysis_dir / f"{username.lower()}_{analysis_type}.json"
 
+    def _get_response_cache_path(self, key: str) -> Path:
+        """Get cache file path for a Claude response, sharded by key prefix"""
+        return self.responses_dir / key[:2] / f"{key}.json"
+
     def _is_expired(self, cache_path: Path) -> bool:
         """Check if a cache file has expired"""
         if not cache_path.exists():
             return True
 
-        mtime = datetime.fromtimestamp(cache_path.stat().st_mtime)
-        return datetime.now() - mtime > self.ttl
+        return self._mtime_expired(cache_path.stat().st_mtime)
+
+    def _mtime_expired(self, mtime: float) -> bool:
+        """Check if a file modified at `mtime` is past the TTL"""
+        return datetime.now() - datetime.fromtimestamp(mtime) > self.ttl
+
+    def _hot_get(self, key: str, mtime: float) -> Optional[Dict]:
+        """Fresh in-memory copy of a user profile, if the file is unchanged"""
+        with self._hot_lock:
+            entry = self._hot_users.get(key)
+            if entry is None:
+                return None
+            stored_at, stored_mtime, data = entry
+            if stored_mtime != mtime or time.monotonic() - stored_at > USER_HOT_CACHE_TTL_SECONDS:
+                del self._hot_users[key]
+                return None
+            self._hot_users.move_to_end(key)
+            return data
+
+    def _hot_put(self, key: str, mtime: float, data: Dict) -> None:
+        """Remember a freshly read user profile, evicting the oldest beyond capacity"""
+        with self._hot_lock:
+            self._hot_users[key] = (time.monotonic(), mtime, data)
+            self._hot_users.move_to_end(key)
+            if len(self._hot_users) > USER_HOT_CACHE_SIZE:
+                self._hot_users.popitem(last=False)
+
+    def _hot_evict(self, key: str) -> None:
+        """Drop a user's in-memory copy after the file changes"""
+        with self._hot_lock:
+            self._hot_users.pop(key, None)
+
+    @staticmethod
+    def _read_json(cache_path: Path) -> Any:
+        """Load a cache file, using orjson when installed"""
+        if orjson is not None:
+            return orjson.loads(cache_path.read_bytes())
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(cache_path: Path, data: Any, indent: bool = False) -> None:
+        """Write a cache file, using orjson when installed"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            cache_path.write_bytes(orjson.dumps(data, option=option))
+            return
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2 if indent else None, ensure_ascii=False)
 
     def _serialize(self, data: Any) -> Dict:
         """Convert dataclass or dict to serializable dict"""
@@ -85,6 +166,13 @@ class CacheManager:
             result[field_name] = self._serialize(value)
         return result
 
+    def _user_payload(self, data: Any) -> Dict:
+        """Serialized user data stamped with cache metadata"""
+        serialized = self._serialize(data)
+        serialized["_cached_at"] = datetime.now().isoformat()
+        serialized["_cache_version"] = "1.0"
+        return serialized
+
     def get_user_cache(self, username: str) -> Optional[Dict]:
         """
         Get cached user data if available and not expired.
@@ -96,16 +184,28 @@ class CacheManager:
             Cached data dict or None
         """
         cache_path = self._get_user_cache_path(username)
+        key = username.lower()
 
-        if self._is_expired(cache_path):
+        try:
+            mtime = cache_path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is None or self._mtime_expired(mtime):
             logger.debug(f"Cache miss or expired for user: {username}")
+            self._hot_evict(key)
             return None
 
+        data = self._hot_get(key, mtime)
+        if data is not None:
+            logger.debug(f"Memory cache hit for user: {username}")
+            return data
+
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                logger.info(f"Cache hit for user: {username}")
-                return data
+            data = self._read_json(cache_path)
+            self._hot_put(key, mtime, data)
+            logger.info(f"Cache hit for user: {username}")
+            return data
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Error reading cache for {username}: {e}")
             return None
@@ -124,12 +224,8 @@ class CacheManager:
         cache_path = self._get_user_cache_path(username)
 
         try:
-            serialized = self._serialize(data)
-            serialized["_cached_at"] = datetime.now().isoformat()
-            serialized["_cache_version"] = "1.0"
-
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(serialized, f, indent=2, ensure_ascii=False)
+            self._write_json(cache_path, self._user_payload(data), indent=True)
+            self._hot_evict(username.lower())
 
             logger.info(f"Cached data for user: {username}")
             return True
@@ -137,6 +233,34 @@ class CacheManager:
             logger.error(f"Error caching data for {username}: {e}")
             return False
 
+    async def aget_user_cache(self, username: str) -> Optional[Dict]:
+        """Async variant of get_user_cache()"""
+        return await asyncio.to_thread(self.get_user_cache, username)
+
+    async def aset_user_cache(self, username: str, data: Any) -> bool:
+        """Async variant of set_user_cache()"""
+        return await asyncio.to_thread(self.set_user_cache, username, data)
+
+    def get_user_fields(self, username: str, fields: Iterable[str]) -> Optional[Dict]:
+        """
+        Get selected top-level fields of a cached user profile.
+
+        Args:
+            username: Reddit username
+            fields: Profile keys to return; absent keys are left out
+
+        Returns:
+            Dict of the requested fields, or None if the profile isn't cached
+        """
+        data = self.get_user_cache(username)
+        if data is None:
+            return None
+        return {name: data[name] for name in fields if name in data}
+
+    async def aget_user_fields(self, username: str, fields: Iterable[str]) -> Optional[Dict]:
+        """Async variant of get_user_fields()"""
+        return await asyncio.to_thread(self.get_user_fields, username, fields)
+
     def get_analysis_cache(
         self,
         username: str,
@@ -158,8 +282,7 @@ class CacheManager:
             return None
 
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return self._read_json(cache_path)
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Error reading analysis cache: {e}")
             return None
@@ -188,8 +311,7 @@ class CacheManager:
             serialized["_cached_at"] = datetime.now().isoformat()
             serialized["_analysis_type"] = analysis_type
 
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(serialized, f, indent=2, ensure_ascii=False)
+            self._write_json(cache_path, serialized, indent=True)
 
             return True
         except (TypeError, IOError) as e:
@@ -204,8 +326,7 @@ class CacheManager:
             return None
 
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return self._read_json(cache_path)
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Error reading debate cache: {e}")
             return None
@@ -218,14 +339,48 @@ class CacheManager:
             serialized = self._serialize(data)
             serialized["_cached_at"] = datetime.now().isoformat()
 
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(serialized, f, indent=2, ensure_ascii=False)
+            self._write_json(cache_path, serialized, indent=True)
 
             return True
         except (TypeError, IOError) as e:
             logger.error(f"Error caching debate: {e}")
             return False
 
+    @staticmethod
+    def response_key(*parts: str) -> str:
+        """Content hash identifying a Claude request"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_response_cache(self, key: str) -> Optional[Dict]:
+        """Get a cached Claude response by request hash"""
+        cache_path = self._get_response_cache_path(key)
+
+        if self._is_expired(cache_path):
+            return None
+
+        try:
+            return self._read_json(cache_path)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Error reading response cache: {e}")
+            return None
+
+    def set_response_cache(self, key: str, data: Dict) -> bool:
+        """Cache a parsed Claude response by request hash"""
+        cache_path = self._get_response_cache_path(key)
+
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            self._write_json(cache_path, data)
+
+            return True
+        except (TypeError, IOError) as e:
+            logger.error(f"Error caching response: {e}")
+            return False
+
     def invalidate_user(self, username: str) -> bool:
         """
         Invalidate all cache entries for a user.
@@ -238,6 +393,7 @@ class CacheManager:
         """
         removed = False
         username_lower = username.lower()
+        self._hot_evict(username_lower)
 
         # Remove user cache
         user_cache = self._get_user_cache_path(username)
@@ -253,12 +409,17 @@ class CacheManager:
         logger.info(f"Invalidated cache for user: {username}")
         return removed
 
+    async def ainvalidate_user(self, username: str) -> bool:
+        """Async variant of invalidate_user()"""
+        return await asyncio.to_thread(self.invalidate_user, username)
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         stats = {
             "users_cached": len(list(self.users_dir.glob("*.json"))),
             "debates_cached": len(list(self.debates_dir.glob("*.json"))),
             "analyses_cached": len(list(self.analysis_dir.glob("*.json"))),
+            "responses_cached": len(list(self.responses_dir.rglob("*.json"))),
             "total_size_bytes": sum(
                 f.stat().st_size
                 for f in self.cache_dir.rglob("*.json")
@@ -267,6 +428,36 @@ class CacheManager:
         stats["total_size_mb"] = round(stats["total_size_bytes"] / (1024 * 1024), 2)
         return stats
 
+    async def aget_cache_stats(self) -> Dict[str, Any]:
+        """Async variant of get_cache_stats()"""
+        return await asyncio.to_thread(self.get_cache_stats)
+
+    def get_job_status(self, username: str) -> Optional[Dict]:
+        """Get the tracked analysis job for a user, if any"""
+        return self._jobs.get(username.lower())
+
+    def set_job_status(self, username: str, status: Dict) -> None:
+        """Record the current state of a user's analysis job"""
+        self._jobs[username.lower()] = status
+
+    def count_jobs(self, status: str) -> int:
+        """Number of tracked analysis jobs currently in `status`"""
+        return sum(1 for job in self._jobs.values() if job.get("status") == status)
+
+    # Job state is in memory here, so the async variants skip the thread hop
+
+    async def aget_job_status(self, username: str) -> Optional[Dict]:
+        """Async variant of get_job_status()"""
+        return self.get_job_status(username)
+
+    async def aset_job_status(self, username: str, status: Dict) -> None:
+        """Async variant of set_job_status()"""
+        self.set_job_status(username, status)
+
+    async def acount_jobs(self, status: str) -> int:
+        """Async variant of count_jobs()"""
+        return self.count_jobs(status)
+
     def cleanup_expired(self) -> int:
         """
         Remove all expired cache entries.
@@ -283,3 +474,7 @@ class CacheManager:
 
         logger.info(f"Cleaned up {removed} expired cache entries")
         return removed
+
+    async def acleanup_expired(self) -> int:
+        """Async variant of cleanup_expired()"""
+        return await asyncio.to_thread(self.cleanup_expired)
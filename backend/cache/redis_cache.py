@@ -0,0 +1,299 @@
+"""
+Redis-backed caching for user profiles and analysis jobs
+
+Lets several API workers or replicas share profiles and job status; debate,
+analysis and Claude response caches stay on the local filesystem.
+"""
+
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, List
+
+try:
+    import redis
+    import redis.asyncio as aredis
+except ImportError:
+    redis = None
+    aredis = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from cache.cache_manager import CacheManager
+
+logger = logging.getLogger(__name__)
+
+USER_KEY_PREFIX = "user:"
+JOB_KEY_PREFIX = "job:"
+
+# Always present in a stored profile; doubles as the existence check
+# when fetching selected fields
+CACHED_AT_FIELD = "_cached_at"
+
+# Finished jobs only need to outlive a client's status polling
+JOB_TTL_SECONDS = 24 * 3600
+
+
+def _dumps(data: Any) -> bytes:
+    """Encode a value for Redis, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Any:
+    """Decode a value read from Redis"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class RedisCacheManager(CacheManager):
+    """
+    CacheManager that keeps user profiles and job status in Redis.
+
+    Profiles are stored as a hash `user:{name}` with one JSON-encoded entry
+    per top-level field, so an endpoint can fetch just the sections it
+    renders in a single HMGET. Jobs are JSON strings under `job:{name}`.
+    Both expire on the Redis side. The sync methods use a pooled blocking
+    client (for the CLI pipeline and worker threads); the async variants use
+    a pooled redis.asyncio client so request handlers never leave the loop.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        redis_url: str,
+        ttl_hours: int = 24,
+    ):
+        if redis is None:
+            raise ImportError("The redis package is required for the Redis cache backend")
+
+        super().__init__(cache_dir=cache_dir, ttl_hours=ttl_hours)
+        self.ttl_seconds = int(self.ttl.total_seconds())
+
+        self._redis = redis.Redis(connection_pool=redis.ConnectionPool.from_url(redis_url))
+        self._aredis = aredis.Redis(connection_pool=aredis.ConnectionPool.from_url(redis_url))
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return f"{USER_KEY_PREFIX}{username.lower()}"
+
+    @staticmethod
+    def _job_key(username: str) -> str:
+        return f"{JOB_KEY_PREFIX}{username.lower()}"
+
+    @staticmethod
+    def _encode_fields(payload: Dict) -> Dict[str, bytes]:
+        """Hash mapping of a profile, one JSON value per top-level field"""
+        return {name: _dumps(value) for name, value in payload.items()}
+
+    def _decode_fields(self, username: str, raw: Dict[bytes, bytes]) -> Optional[Dict]:
+        """Parse a stored profile hash, treating empty or unreadable entries as misses"""
+        if not raw:
+            logger.debug(f"Cache miss or expired for user: {username}")
+            return None
+        try:
+            data = {name.decode("utf-8"): _loads(value) for name, value in raw.items()}
+            logger.info(f"Cache hit for user: {username}")
+            return data
+        except ValueError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+
+    def _decode_selected(
+        self,
+        username: str,
+        fields: List[str],
+        values: List[Optional[bytes]],
+    ) -> Optional[Dict]:
+        """Parse HMGET results for [CACHED_AT_FIELD, *fields]"""
+        if values[0] is None:
+            logger.debug(f"Cache miss or expired for user: {username}")
+            return None
+        try:
+            return {
+                name: _loads(value)
+                for name, value in zip(fields, values[1:])
+                if value is not None
+            }
+        except ValueError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+
+    def get_user_cache(self, username: str) -> Optional[Dict]:
+        """Get cached user data from Redis; expiry is enforced by Redis"""
+        try:
+            raw = self._redis.hgetall(self._user_key(username))
+        except redis.RedisError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+        return self._decode_fields(username, raw)
+
+    async def aget_user_cache(self, username: str) -> Optional[Dict]:
+        """Async variant of get_user_cache()"""
+        try:
+            raw = await self._aredis.hgetall(self._user_key(username))
+        except redis.RedisError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+        return self._decode_fields(username, raw)
+
+    def get_user_fields(self, username: str, fields: Iterable[str]) -> Optional[Dict]:
+        """Get selected profile fields in one HMGET round trip"""
+        fields = list(fields)
+        try:
+            values = self._redis.hmget(self._user_key(username), [CACHED_AT_FIELD, *fields])
+        except redis.RedisError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+        return self._decode_selected(username, fields, values)
+
+    async def aget_user_fields(self, username: str, fields: Iterable[str]) -> Optional[Dict]:
+        """Async variant of get_user_fields()"""
+        fields = list(fields)
+        try:
+            values = await self._aredis.hmget(self._user_key(username), [CACHED_AT_FIELD, *fields])
+        except redis.RedisError as e:
+            logger.error(f"Error reading cache for {username}: {e}")
+            return None
+        return self._decode_selected(username, fields, values)
+
+    def set_user_cache(self, username: str, data: Any) -> bool:
+        """Cache user data in Redis with the configured TTL"""
+        key = self._user_key(username)
+        try:
+            mapping = self._encode_fields(self._user_payload(data))
+            # Replace the whole hash atomically so no stale fields survive
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+            logger.info(f"Cached data for user: {username}")
+            return True
+        except (TypeError, redis.RedisError) as e:
+            logger.error(f"Error caching data for {username}: {e}")
+            return False
+
+    async def aset_user_cache(self, username: str, data: Any) -> bool:
+        """Async variant of set_user_cache()"""
+        key = self._user_key(username)
+        try:
+            mapping = self._encode_fields(self._user_payload(data))
+            async with self._aredis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl_seconds)
+                await pipe.execute()
+            logger.info(f"Cached data for user: {username}")
+            return True
+        except (TypeError, redis.RedisError) as e:
+            logger.error(f"Error caching data for {username}: {e}")
+            return False
+
+    def invalidate_user(self, username: str) -> bool:
+        """Remove the user's Redis profile and on-disk analysis caches"""
+        try:
+            removed = bool(self._redis.delete(self._user_key(username)))
+        except redis.RedisError as e:
+            logger.error(f"Error invalidating cache for {username}: {e}")
+            removed = False
+        return super().invalidate_user(username) or removed
+
+    async def ainvalidate_user(self, username: str) -> bool:
+        """Async variant of invalidate_user()"""
+        try:
+            removed = bool(await self._aredis.delete(self._user_key(username)))
+        except redis.RedisError as e:
+            logger.error(f"Error invalidating cache for {username}: {e}")
+            removed = False
+        # Only the file caches are left; going through super() would reach
+        # the override above and delete the Redis key again
+        files_removed = await asyncio.to_thread(CacheManager.invalidate_user, self, username)
+        return files_removed or removed
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Cache statistics, counting user profiles held in Redis"""
+        stats = super().get_cache_stats()
+        try:
+            stats["users_cached"] = sum(1 for _ in self._redis.scan_iter(match=f"{USER_KEY_PREFIX}*"))
+        except redis.RedisError as e:
+            logger.error(f"Error counting cached users: {e}")
+            stats["users_cached"] = None
+        return stats
+
+    # Job status is best effort: a Redis failure is logged and reads as "no
+    # job" so a blip can't crash the pipeline or wedge a user's job record
+
+    def get_job_status(self, username: str) -> Optional[Dict]:
+        """Get the tracked analysis job for a user, if any"""
+        try:
+            raw = self._redis.get(self._job_key(username))
+            return _loads(raw) if raw is not None else None
+        except (ValueError, redis.RedisError) as e:
+            logger.error(f"Error reading job status for {username}: {e}")
+            return None
+
+    def set_job_status(self, username: str, status: Dict) -> None:
+        """Record the current state of a user's analysis job"""
+        try:
+            self._redis.set(self._job_key(username), _dumps(status), ex=JOB_TTL_SECONDS)
+        except (TypeError, redis.RedisError) as e:
+            logger.error(f"Error saving job status for {username}: {e}")
+
+    def count_jobs(self, status: str) -> int:
+        """Number of tracked analysis jobs currently in `status`"""
+        try:
+            keys = list(self._redis.scan_iter(match=f"{JOB_KEY_PREFIX}*"))
+            if not keys:
+                return 0
+            return sum(
+                1 for raw in self._redis.mget(keys)
+                if raw is not None and _loads(raw).get("status") == status
+            )
+        except (ValueError, redis.RedisError) as e:
+            logger.error(f"Error counting jobs: {e}")
+            return 0
+
+    async def aget_job_status(self, username: str) -> Optional[Dict]:
+        """Async variant of get_job_status()"""
+        try:
+            raw = await self._aredis.get(self._job_key(username))
+            return _loads(raw) if raw is not None else None
+        except (ValueError, redis.RedisError) as e:
+            logger.error(f"Error reading job status for {username}: {e}")
+            return None
+
+    async def aset_job_status(self, username: str, status: Dict) -> None:
+        """Async variant of set_job_status()"""
+        try:
+            await self._aredis.set(self._job_key(username), _dumps(status), ex=JOB_TTL_SECONDS)
+        except (TypeError, redis.RedisError) as e:
+            logger.error(f"Error saving job status for {username}: {e}")
+
+    async def acount_jobs(self, status: str) -> int:
+        """Async variant of count_jobs()"""
+        try:
+            keys = [key async for key in self._aredis.scan_iter(match=f"{JOB_KEY_PREFIX}*")]
+            if not keys:
+                return 0
+            return sum(
+                1 for raw in await self._aredis.mget(keys)
+                if raw is not None and _loads(raw).get("status") == status
+            )
+        except (ValueError, redis.RedisError) as e:
+            logger.error(f"Error counting jobs: {e}")
+            return 0
+
+    def close(self) -> None:
+        """Release pooled blocking connections"""
+        self._redis.close()
+
+    async def aclose(self) -> None:
+        """Release pooled async connections"""
+        await self._aredis.aclose()
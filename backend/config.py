@@ -19,6 +19,9 @@ class Config:
     claude_model: str = "claude-sonnet-4-20250514"
     claude_max_tokens: int = 4096
     claude_temperature: float = 0.3
+    claude_rpm: Optional[int] = None  # requests/minute cap, None = unthrottled
+    claude_tpm: Optional[int] = None  # input tokens/minute cap
+    claude_use_batch_api: bool = False  # half-price Message Batches, slower turnaround
 
     # Reddit settings
     reddit_user_agent: str = "ErisDebateAnalyzer/1.0 (Research Tool)"
@@ -29,11 +32,13 @@ class Config:
     # Cache settings
     cache_dir: Path = Path("cache")
     cache_ttl_hours: int = 24
+    cache_backend: str = "file"  # "file" or "redis" (profiles + job status shared across workers)
+    redis_url: str = "redis://localhost:6379/0"
 
     # Analysis settings
     min_debate_score: float = 0.3
     max_debates_per_user: int = 100
-    batch_size: int = 10
+    batch_size: int = 30
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -48,8 +53,13 @@ class Config:
         return cls(
             anthropic_api_key=api_key,
             claude_model=os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-20250514"),
+            claude_rpm=int(os.environ["CLAUDE_RPM"]) if os.environ.get("CLAUDE_RPM") else None,
+            claude_tpm=int(os.environ["CLAUDE_TPM"]) if os.environ.get("CLAUDE_TPM") else None,
+            claude_use_batch_api=os.environ.get("CLAUDE_USE_BATCH_API", "").lower() in ("1", "true", "yes"),
             cache_dir=cache_dir,
             cache_ttl_hours=int(os.environ.get("CACHE_TTL_HOURS", "24")),
+            cache_backend=os.environ.get("CACHE_BACKEND", "file").lower(),
+            redis_url=os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
             min_debate_score=float(os.environ.get("MIN_DEBATE_SCORE", "0.3")),
         )
 
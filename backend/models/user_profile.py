@@ -32,6 +32,17 @@ class FallacyType(str, Enum):
     CHERRY_PICKING = "cherry_picking"
     EQUIVOCATION = "equivocation"
     BEGGING_THE_QUESTION = "begging_the_question"
+    TU_QUOQUE = "tu_quoque"
+    APPEAL_TO_TRADITION = "appeal_to_tradition"
+    LOADED_QUESTION = "loaded_question"
+    POST_HOC = "post_hoc"
+    AMPHIBOLY = "amphiboly"
+    ACCENT = "accent"
+    COMPOSITION = "composition"
+    DIVISION = "division"
+    MOTTE_AND_BAILEY = "motte_and_bailey"
+    KAFKA_TRAP = "kafka_trap"
+    OTHER = "other"
 
 
 class FallacySeverity(str, Enum):
@@ -54,6 +65,10 @@ class ArchetypeType(str, Enum):
     MEDIATOR = "mediator"
     PROSECUTOR = "prosecutor"
     STORYTELLER = "storyteller"
+    DIPLOMAT = "diplomat"
+    CONTRARIAN = "contrarian"
+    EMPIRICIST = "empiricist"
+    GENERALIST = "generalist"
 
 
 class ArgumentCategory(str, Enum):
@@ -116,7 +131,7 @@ class RedditPost:
         return len(self.selftext.split()) if self.selftext else 0
 
 
-@dataclass
+@dataclass(slots=True)
 class DebateMetadata:
     """Metadata about a debate exchange"""
     topic: str
@@ -143,17 +158,25 @@ class DebateThread:
     is_debate: bool = False
     confidence: float = 0.0
 
+    # Derived from user_comments once at construction
+    max_user_depth: int = field(init=False, default=0)
+    user_word_count: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.max_user_depth = max((c.depth for c in self.user_comments), default=0)
+        self.user_word_count = sum(c.word_count for c in self.user_comments)
+
     @property
     def user_comment_count(self) -> int:
         return len(self.user_comments)
 
     @property
     def total_words(self) -> int:
-        return sum(c.word_count for c in self.user_comments)
+        return self.user_word_count
 
     @property
     def max_depth(self) -> int:
-        return max((c.depth for c in self.user_comments), default=0)
+        return self.max_user_depth
 
 
 @dataclass
@@ -185,6 +208,94 @@ class ArgumentQuality:
     top_argument_reasons: List[str] = field(default_factory=list)
 
 
+@dataclass
+class QualityAggregate:
+    """Dimension totals across a user's ArgumentQuality results, built in one pass"""
+    n: int = 0
+    sum_overall: int = 0
+    sum_structure: int = 0
+    sum_evidence: int = 0
+    sum_counter: int = 0
+    sum_persuade: int = 0
+    sum_civility: int = 0
+    high_evidence: int = 0  # debates with evidence_score >= 70
+    high_civility: int = 0  # debates with civility_score >= 80
+    changed_minds: int = 0  # debates where the user changed the opponent's mind
+
+    @classmethod
+    def from_qualities(cls, qualities) -> "QualityAggregate":
+        # Accumulate in locals; attribute updates on the instance cost a
+        # load and store per field per quality
+        n = overall = structure = evidence = counter = persuade = civility = 0
+        high_evidence = high_civility = changed_minds = 0
+        for q in qualities:
+            n += 1
+            overall += q.overall_score
+            structure += q.structure_score
+            evidence += q.evidence_score
+            counter += q.counterargument_score
+            persuade += q.persuasiveness_score
+            civility += q.civility_score
+            if q.evidence_score >= 70:
+                high_evidence += 1
+            if q.civility_score >= 80:
+                high_civility += 1
+            if q.changed_opponent_mind:
+                changed_minds += 1
+        return cls(
+            n=n,
+            sum_overall=overall,
+            sum_structure=structure,
+            sum_evidence=evidence,
+            sum_counter=counter,
+            sum_persuade=persuade,
+            sum_civility=civility,
+            high_evidence=high_evidence,
+            high_civility=high_civility,
+            changed_minds=changed_minds,
+        )
+
+    def _avg(self, total: int, default: float) -> float:
+        return total / self.n if self.n else default
+
+    def avg_overall(self, default: float = 0) -> float:
+        return self._avg(self.sum_overall, default)
+
+    def avg_structure(self, default: float = 0) -> float:
+        return self._avg(self.sum_structure, default)
+
+    def avg_evidence(self, default: float = 0) -> float:
+        return self._avg(self.sum_evidence, default)
+
+    def avg_counter(self, default: float = 0) -> float:
+        return self._avg(self.sum_counter, default)
+
+    def avg_persuade(self, default: float = 0) -> float:
+        return self._avg(self.sum_persuade, default)
+
+    def avg_civility(self, default: float = 0) -> float:
+        return self._avg(self.sum_civility, default)
+
+
+@dataclass
+class DebateAggregate:
+    """Counts across a user's DebateThreads, built in one pass"""
+    n: int = 0
+    total_user_comments: int = 0
+    concessions: int = 0  # debates whose apparent outcome is opponent_won
+
+    @classmethod
+    def from_debates(cls, debates) -> "DebateAggregate":
+        n = total_user_comments = concessions = 0
+        for debate in debates:
+            n += 1
+            total_user_comments += len(debate.user_comments)
+            metadata = debate.metadata
+            if metadata is not None and metadata.apparent_outcome == "opponent_won":
+                concessions += 1
+        return cls(n=n, total_user_comments=total_user_comments, concessions=concessions)
+
+
 @dataclass
 class FallacyInstance:
     """A detected logical fallacy instance"""
@@ -206,6 +317,17 @@ class FallacyInstance:
     disputed: bool = False
     dispute_status: Optional[str] = None  # pending, upheld, overturned
 
+    debate_id: str = ""
+    is_pattern: bool = False
+
+    # Plain-string enum values, cached for aggregation loops
+    fallacy_type_value: str = field(init=False, default="")
+    severity_value: str = field(init=False, default="")
+
+    def __post_init__(self):
+        self.fallacy_type_value = self.fallacy_type.value
+        self.severity_value = self.severity.value
+
 
 @dataclass
 class TopArgument:
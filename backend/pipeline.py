@@ -14,7 +14,7 @@ import logging
 import argparse
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from datetime import datetime
 
 from config import Config
@@ -88,10 +88,17 @@ class AnalysisPipeline:
         self.claude = ClaudeClient(
             api_key=self.config.anthropic_api_key,
             model=self.config.claude_model,
+            rpm=self.config.claude_rpm,
+            tpm=self.config.claude_tpm,
+            response_cache=self.cache,
         )
         self.debate_identifier = DebateIdentifier(self.claude)
         self.argument_analyzer = ArgumentAnalyzer(self.claude)
-        self.profile_synthesizer = ProfileSynthesizer(self.claude)
+        self.profile_synthesizer = ProfileSynthesizer(
+            self.claude,
+            use_batch_api=self.config.claude_use_batch_api,
+            cache=self.cache,
+        )
 
     def _update_progress(self, stage: str, percent: int, message: str = ""):
         """Update and report progress"""
@@ -181,6 +188,7 @@ class AnalysisPipeline:
             identified = self.debate_identifier.identify_debates(
                 username=username,
                 threads=potential_debates,
+                batch_size=self.config.batch_size,
             )
 
             debates = [t for t in identified if t.is_debate]
@@ -213,13 +221,14 @@ class AnalysisPipeline:
                 debates=debates,
                 quality_results=quality_results,
                 run_all_analyses=True,
+                force_refresh=force_refresh,
             )
             self._update_progress("synthesizing", 90, "Profile synthesized")
 
             # Stage 7: Cache results
             self._update_progress("caching", 95, "Caching results")
 
-            profile_data = asdict(synthesized_profile)
+            profile_data = self.profile_synthesizer.to_dict(synthesized_profile)
             profile_data["total_threads"] = len(threads)
             self.cache.set_user_cache(username, profile_data)
 